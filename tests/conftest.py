@@ -3,3 +3,97 @@ import sys, pathlib
 root = pathlib.Path(__file__).resolve().parents[1]
 if str(root) not in sys.path:
     sys.path.insert(0, str(root))
+
+import asyncio  # noqa: E402
+
+from x987.collectors.autotempest import HARVEST_JS  # noqa: E402
+
+
+class StubCdp:
+    """CDP session stub: records the methods sent (and their params) and the event handlers."""
+
+    def __init__(self, sent):
+        self.sent = sent
+        self.params = {}
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    async def send(self, method, params=None):
+        await asyncio.sleep(0)  # a round trip to the browser
+        self.sent.append(method)
+        self.params[method] = params
+
+
+class StubPage:
+    """
+    Playwright page stub. goto() hands (page, url) to the session's `on_goto`,
+    which sets what the page shows (`links` for a results page, `body`/`specs`
+    for a detail page) or raises, then records the URL in `session.loaded`.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.context = session
+        self.links = []  # [url, card text] pairs for the collector's link harvest
+        self.body = ""
+        self.specs = {}
+
+    def on(self, *a):
+        pass
+
+    async def goto(self, url, **kw):
+        if self.session.on_goto is not None:
+            self.session.on_goto(self, url)
+        self.session.loaded.append(url)
+
+    async def wait_for_selector(self, *a, **kw):
+        pass
+
+    async def wait_for_function(self, *a, **kw):
+        pass
+
+    async def evaluate(self, js, arg=None):
+        if js == HARVEST_JS:
+            return self.links
+        return {"body": self.body, "specs": self.specs}
+
+    async def close(self):
+        pass
+
+
+class StubSession:
+    """
+    Stands in for a BrowserSession (or its context): new_page() gives StubPages,
+    attached to `blocker` first when one is given, and run() drives a coroutine.
+    """
+
+    def __init__(self, on_goto=None, blocker=None):
+        self.on_goto = on_goto
+        self.blocker = blocker
+        self.loaded = []
+        self.sent = []  # CDP methods and context routes, in order
+        self.cdp = None
+        self.cdp_sessions = 0
+
+    def on(self, *a):
+        pass
+
+    async def new_page(self):
+        page = StubPage(self)
+        if self.blocker is not None:
+            self.blocker.attach(page)  # what the context's "page" event does
+        return page
+
+    async def new_cdp_session(self, page):
+        self.cdp_sessions += 1
+        await asyncio.sleep(0)
+        self.cdp = StubCdp(self.sent)
+        return self.cdp
+
+    async def route(self, *a):
+        self.sent.append("route")
+
+    def run(self, coro):
+        return asyncio.run(coro)
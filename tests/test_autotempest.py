@@ -0,0 +1,94 @@
+from conftest import StubSession
+
+from x987.collectors.autotempest import card_from_text, listings_from_json, page_url
+
+BASE = "https://www.autotempest.com/results?make=porsche&model=cayman&zip=30214"
+
+
+def test_page_url_sets_and_replaces_page_param():
+    assert page_url(BASE, 1) == BASE
+    assert page_url(BASE, 3) == BASE + "&page=3"
+    assert page_url(BASE + "&page=2", 4) == BASE + "&page=4"
+    assert page_url(BASE + "&page=2", 1) == BASE
+    assert page_url(BASE, 2, "p").endswith("&p=2")
+
+
+def test_listings_from_json_reads_cards():
+    payload = {
+        "results": [
+            {
+                "title": "2010 Porsche Cayman S",
+                "price": "$41,990",
+                "mileage": "52,100 mi",
+                "year": 2010,
+                "url": "https://www.cars.com/vehicledetail/123/?attribution=x",
+            },
+            {"title": "Ad", "url": "https://example.com/ad"},
+            {"group": {"items": [{"listingUrl": "https://www.cars.com/vehicledetail/456/", "miles": 9000}]}},
+        ]
+    }
+    cards = listings_from_json(payload)
+    assert [c["listing_url"] for c in cards] == [
+        "https://www.cars.com/vehicledetail/123/",
+        "https://www.cars.com/vehicledetail/456/",
+    ]
+    assert cards[0]["price_usd"] == 41990 and cards[0]["mileage"] == 52100 and cards[0]["year"] == 2010
+    assert cards[1]["mileage"] == 9000 and cards[1]["price_usd"] is None
+
+
+def test_card_from_text_reads_rendered_card():
+    # innerText of the second card in fixtures/autotempest_results.html
+    url = "https://www.cars.com/vehicledetail/100000037/"
+    card = card_from_text(url, "photo\n2010 Porsche Cayman S\n$35,173\n20,611 mi\nDealer")
+    assert card == {
+        "source": "cars.com",
+        "listing_url": url,
+        "price_usd": 35173,
+        "mileage": 20611,
+        "year": 2010,
+        "title": "2010 Porsche Cayman S",
+        "trim": "S",
+    }
+    bare = card_from_text(url, "photo\nCall for price\nDealer")
+    assert bare["title"] is None and bare["year"] is None and bare["price_usd"] is None and bare["mileage"] is None
+
+
+def _results_page(page, url):
+    # five listings per results page, newest first
+    n = int(dict(p.split("=") for p in url.split("?")[1].split("&")).get("page", 1))
+    page.links = [[f"https://www.cars.com/vehicledetail/{n * 10 + i}/", ""] for i in range(5)]
+
+
+def test_incremental_collection_stops_at_known_listings(tmp_path):
+    import asyncio
+
+    from x987.collectors.autotempest import collect_autotempest_async
+    from x987.pipeline.seen import SeenSet
+
+    known = SeenSet(tmp_path / "seen.json")
+    for n in range(20, 60):  # pages 2..5 were collected on an earlier run
+        known.add(f"https://www.cars.com/vehicledetail/{n}/")
+    cfg = {"collect": {"xhr": False, "stop_after_known": 3}, "rate_limit": {"start_rps": 1000, "max_rps": 1000}}
+    ctx = StubSession(on_goto=_results_page)
+    out = asyncio.run(collect_autotempest_async([BASE], cfg, ctx, known=known))
+
+    assert len(ctx.loaded) == 2 and all("sort=date_listed" in u for u in ctx.loaded)
+    assert len(out) == 10
+
+
+def _flaky_results_page(page, url):
+    if "q=bad" in url and "page=3" in url:
+        raise TimeoutError("Timeout 30000ms exceeded")
+    _results_page(page, url)
+
+
+def test_failed_results_page_ends_only_that_search():
+    import asyncio
+
+    from x987.collectors.autotempest import collect_autotempest_async
+
+    cfg = {"collect": {"xhr": False, "max_pages": 4}, "rate_limit": {"start_rps": 1000, "max_rps": 1000}}
+    out = asyncio.run(collect_autotempest_async([BASE, BASE + "&q=bad"], cfg, StubSession(on_goto=_flaky_results_page)))
+
+    # the good search walks all 4 pages; the bad one keeps pages 1-2
+    assert len(out) == 20 + 10
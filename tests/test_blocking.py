@@ -0,0 +1,76 @@
+import asyncio
+
+from conftest import StubSession
+
+from x987.utils.browser import BrowserSession, RequestBlocker
+
+
+def test_blocker_patterns_follow_network_config():
+    all_on = RequestBlocker({})
+    assert "*.png*" in all_on.patterns and "*googletagmanager.com*" in all_on.patterns
+
+    fonts_only = RequestBlocker(
+        {"network": {"block_images": False, "block_media": False, "block_stylesheets": False, "block_analytics": False}}
+    )
+    assert fonts_only.block_types == {"font"}
+    assert all(p.startswith(("*.woff", "*.ttf", "*.otf")) for p in fonts_only.patterns)
+
+
+def test_blocker_counts_cdp_events():
+    b = RequestBlocker({})
+    b._on_finished({"requestId": "1", "encodedDataLength": 2048})
+    b._on_finished({"requestId": "2", "encodedDataLength": 1000.0})
+    b._on_failed({"requestId": "3", "type": "Image", "blockedReason": "inspector"})
+    b._on_failed({"requestId": "4", "type": "XHR", "canceled": True})
+    b._on_failed({"requestId": "5", "type": "Script", "errorText": "net::ERR_FAILED"})
+    b._on_failed({"requestId": "6", "type": "Font", "errorText": "net::ERR_BLOCKED_BY_CLIENT"})  # Fetch.failRequest
+    assert b.summary() == {
+        "allowed": 2,
+        "allowed_bytes": 3048,
+        "blocked": 2,
+        "routed": 0,
+        "failed": 1,
+        "blocked_by_type": {"image": 1, "font": 1},
+    }
+
+
+def test_session_pages_are_blocked_before_first_goto():
+    session = BrowserSession({})
+    try:
+        session.blocker = RequestBlocker({})
+        session.context = StubSession(blocker=session.blocker)
+        session.run(session.blocker.install(session.context))
+        session.run(session.new_page())
+        assert session.context.sent == ["Network.enable", "Network.setBlockedURLs", "Fetch.enable"]
+        assert session.context.cdp_sessions == 1  # the page event and new_page() share one attach
+    finally:
+        session.loop.close()
+
+
+def test_only_blocked_types_pause_and_fail():
+    session = BrowserSession({})
+    try:
+        session.blocker = RequestBlocker({"network": {"block_media": False, "block_stylesheets": False}})
+        ctx = session.context = StubSession(blocker=session.blocker)
+        session.run(session.blocker.install(ctx))
+        session.run(session.new_page())
+        assert "route" not in ctx.sent  # no Python round trip per request by default
+        types = [p["resourceType"] for p in ctx.cdp.params["Fetch.enable"]["patterns"]]
+        assert types == ["Font", "Image"]
+
+        async def pause():  # CDP events are dispatched on the session's loop
+            ctx.cdp.handlers["Fetch.requestPaused"]({"requestId": "7", "resourceType": "Image"})
+            await asyncio.sleep(0.01)
+
+        session.run(pause())
+        assert ctx.cdp.params["Fetch.failRequest"] == {"requestId": "7", "errorReason": "BlockedByClient"}
+    finally:
+        session.loop.close()
+
+
+def test_explicit_profile_keeps_its_own_storage_state(tmp_path):
+    session = BrowserSession({}, profile_dir=tmp_path / "profile")
+    try:
+        assert session.persistent and session.storage_path.parent == tmp_path / "profile"
+    finally:
+        session.loop.close()
@@ -0,0 +1,161 @@
+import functools
+import http.server
+import pathlib
+import threading
+
+import pytest
+from conftest import StubSession
+
+from x987.scrapers.cars_com_extract import Extractor, classify_page, segment_body
+from x987.scrapers.cars_com_http import fetch_detail_page, missing_required, parse_detail_html
+from x987.utils.http import HttpClient
+
+FIXTURES = pathlib.Path(__file__).parent / "fixtures"
+
+
+class _Handler(http.server.SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def fixture_server():
+    handler = functools.partial(_Handler, directory=str(FIXTURES))
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    t = threading.Thread(target=srv.serve_forever, daemon=True)
+    t.start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_parse_detail_html_specs_and_jsonld():
+    html = (FIXTURES / "cars_com_detail.html").read_text(encoding="utf-8")
+    body, specs = parse_detail_html(html)
+    assert "2010 Porsche Cayman S" in body
+    assert "window.__data" not in body
+    assert specs["Exterior color"] == "Guards Red"
+    assert specs["Title"] == "2010 Porsche Cayman S"
+    assert specs["Price"] == "38990.00"
+
+
+def test_fetch_detail_page_over_http(fixture_server):
+    client, ex = HttpClient(pool_size=2), Extractor({})
+    url = f"{fixture_server}/cars_com_detail.html"
+    try:
+        status, page = fetch_detail_page(client, url)
+        assert status == 200
+        row = ex.extract(url, *page)
+        assert missing_required(row, {}) == []
+        assert row["price_usd"] == 38990
+        assert row["mileage"] == 45123
+        assert (row["year"], row["model"], row["trim"]) == (2010, "Cayman", "S")
+        assert row["vin"] == "WP0AB2A83AU780123"
+        assert row["exterior_color"] == "Guards Red"
+        assert row["interior_color"] == "Sand Beige"
+        assert row["transmission_raw"] == "7-Speed Automatic PDK"
+
+        # second request rides the pooled keep-alive connection
+        fetch_detail_page(client, url)
+        assert sum(p.qsize() for p in client._pools.values()) == 1
+
+        sparse = f"{fixture_server}/cars_com_detail_sparse.html"
+        row = ex.extract(sparse, *fetch_detail_page(client, sparse)[1])
+        assert row["price_usd"] == 27500
+        assert {"vin", "mileage"} <= set(missing_required(row, {}))
+
+        assert fetch_detail_page(client, f"{fixture_server}/nope.html") == (404, None)
+    finally:
+        client.close()
+
+
+def _render_fixture(page, url):
+    # whatever the URL, the browser renders the full fixture
+    page.body, page.specs = parse_detail_html((FIXTURES / "cars_com_detail.html").read_text(encoding="utf-8"))
+
+
+def test_scrape_stays_on_http_unless_fields_are_missing(fixture_server):
+    import asyncio
+
+    from x987.scrapers.cars_com import scrape_cars_com_async
+
+    full, sparse = f"{fixture_server}/cars_com_detail.html", f"{fixture_server}/cars_com_detail_sparse.html"
+    cfg = {"rate_limit": {"start_rps": 1000, "max_rps": 1000}, "extract": {"processes": False}}
+    source = asyncio.Queue()
+    for item in (full, sparse, None):
+        source.put_nowait(item)
+    session = StubSession(on_goto=_render_fixture)
+    rows = asyncio.run(scrape_cars_com_async(source, cfg, session))
+
+    fetched = {r["listing_url"]: r["_fetch"] for r in rows}
+    assert fetched == {full: "http", sparse: "browser"}
+    assert session.loaded == [sparse]  # only the sparse page (no VIN / mileage in its HTML) was rendered
+
+
+def test_classify_page_recognises_dead_and_blocked_pages():
+    body, specs = parse_detail_html((FIXTURES / "cars_com_detail.html").read_text(encoding="utf-8"))
+    assert classify_page(body, specs) == "ok"
+    assert classify_page("Pardon Our Interruption\nAs you were browsing...") == "blocked"
+    assert classify_page("Please verify you are a human") == "blocked"
+    assert classify_page("Sorry! This vehicle has been sold.\nSee similar cars") == "sold"
+    assert classify_page("This listing is no longer available") == "removed"
+    assert classify_page("", None, 404) == "removed"
+
+
+def test_segmented_extract_ignores_similar_vehicles():
+    body = "\n".join(
+        [
+            "Cars for Sale Sell Your Car $0 down",
+            "2010 Porsche Cayman S",
+            "45,123 mi.",
+            "$38,990",
+            "Basics",
+            "Transmission",
+            "6-Speed Manual",
+            "Features",
+            "Sport Chrono Package",
+            "Similar vehicles",
+            "2012 Porsche Cayman R",
+            "$52,500",
+            "12,000 mi.",
+            "VIN: WP0AB2A81CU000001",
+        ]
+    )
+    sec = segment_body(body)
+    assert "$0 down" not in sec.main and "Cayman R" not in sec.main
+    assert "6-Speed Manual" in sec.specs and "Sport Chrono" in sec.features
+
+    row = Extractor({}).extract("u", body, {})
+    assert (row["price_usd"], row["mileage"]) == (38990, 45123)
+    assert row["vin"] is None  # the carousel car's VIN is not this listing's
+    whole = Extractor({"extract": {"segment": False}}).extract("u", body, {})
+    assert whole["vin"] == "WP0AB2A81CU000001"
+
+
+def test_renderer_crash_retries_only_the_browser_fetch(fixture_server, monkeypatch):
+    import asyncio
+
+    from x987.scrapers import cars_com
+
+    gets = []
+    real = cars_com.fetch_detail_page
+    monkeypatch.setattr(cars_com, "fetch_detail_page", lambda client, url: gets.append(url) or real(client, url))
+    sparse = f"{fixture_server}/cars_com_detail_sparse.html"
+    cfg = {"rate_limit": {"start_rps": 1000, "max_rps": 1000}, "extract": {"processes": False}}
+    source = asyncio.Queue()
+    for item in (sparse, None):
+        source.put_nowait(item)
+    crashes = [RuntimeError("Page.goto: Target crashed")]  # the first render only
+
+    def crash_once(page, url):
+        if crashes:
+            raise crashes.pop()
+        _render_fixture(page, url)
+
+    session = StubSession(on_goto=crash_once)
+    rows = asyncio.run(cars_com.scrape_cars_com_async(source, cfg, session))
+
+    assert [r["_fetch"] for r in rows] == ["browser"]
+    assert gets == [sparse] and session.loaded == [sparse]  # one GET; the render alone was retried
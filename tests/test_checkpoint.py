@@ -0,0 +1,50 @@
+from x987.pipeline import checkpoint, scrape
+from x987.pipeline.checkpoint import ScrapeCheckpoint, checkpoint_path, discard_checkpoint
+
+
+def _row(url, **kw):
+    return {"listing_url": url, "price_usd": 50000, **kw}
+
+
+def test_checkpoint_roundtrip_and_torn_line(tmp_path):
+    path = tmp_path / "scrape_x.jsonl"
+    ck = ScrapeCheckpoint(path, every=2)
+    ck.add(_row("https://www.cars.com/vehicledetail/1/"))
+    assert not path.exists()  # buffered until `every` rows
+    ck.add(_row("https://www.cars.com/vehicledetail/2/", error="timeout"))
+    ck.add(_row("https://www.cars.com/vehicledetail/3/"))
+    ck.flush()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"listing_url": "https://www.cars.com/vehic')  # crash mid-write
+
+    again = ScrapeCheckpoint(path)
+    assert again.is_done("https://WWW.cars.com/vehicledetail/1?ref=x")
+    assert not again.is_done("https://www.cars.com/vehicledetail/2/")  # errors are retried
+    assert len(again.done_rows()) == 2
+
+    again.add(_row("https://www.cars.com/vehicledetail/2/"))
+    again.flush()
+    assert len(ScrapeCheckpoint(path).done_rows()) == 3
+
+
+def test_finished_run_checkpoint_is_discarded(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoint, "get_paths", lambda: {"RAW_DIR": tmp_path})
+    ck = ScrapeCheckpoint.for_run("20260101_120000", {})
+    ck.add(_row("https://www.cars.com/vehicledetail/1/"))
+    ck.flush()
+    assert checkpoint_path("20260101_120000").exists()
+    assert not checkpoint_path("20260101_12000").exists()  # what --resume checks before starting
+
+    discard_checkpoint("20260101_120000")
+    assert not checkpoint_path("20260101_120000").exists()
+    discard_checkpoint("20260101_120000")  # already gone: no error
+
+
+def test_resume_hint_only_when_a_checkpoint_was_written(tmp_path, capsys):
+    scrape._interrupted(ScrapeCheckpoint(tmp_path / "scrape_a.jsonl"), "a")  # nothing buffered yet
+    assert "--resume" not in capsys.readouterr().out
+
+    ck = ScrapeCheckpoint(tmp_path / "scrape_b.jsonl")
+    ck.add(_row("https://www.cars.com/vehicledetail/1/"))
+    scrape._interrupted(ck, "b")
+    assert "python -m x987 --resume b" in capsys.readouterr().out
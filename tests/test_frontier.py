@@ -0,0 +1,56 @@
+import asyncio
+
+from x987.pipeline.frontier import Frontier
+from x987.pipeline.state import ListingState
+
+
+def _card(n, price=None):
+    return {"source": "cars.com", "listing_url": f"https://www.cars.com/vehicledetail/{n}/", "price_usd": price}
+
+
+def _drain(frontier):
+    async def _run():
+        out = asyncio.Queue()
+        await frontier.pump(out)
+        got = []
+        while (card := out.get_nowait()) is not None:
+            got.append(card["listing_url"].rstrip("/").rsplit("/", 1)[1])
+        return got
+
+    return asyncio.run(_run())
+
+
+def test_frontier_orders_by_value_and_caps(tmp_path):
+    state = ListingState(tmp_path / "s.json", ttl_s=3600)
+    state.record({"listing_url": _card("fresh")["listing_url"], "price_usd": 40000})
+    state.record({"listing_url": _card("repriced")["listing_url"], "price_usd": 40000})
+    state.record({"listing_url": _card("stale")["listing_url"], "price_usd": 40000}, now=0)
+
+    fr = Frontier({"cap_listings": 3}, state)
+    for card in [_card("fresh", 40000), _card("stale", 40000), _card("repriced", 38000), _card("new")]:
+        fr.push(card)
+    fr.push(_card("new"))  # duplicates are ignored
+    fr.close()
+
+    assert _drain(fr) == ["new", "repriced", "stale"]
+    assert fr.summary()["skipped_cap"] == 1
+
+
+def test_frontier_demotes_deferred_cards():
+    fr = Frontier({})
+    fr.push(_card("pricey"), demote=True)
+    fr.push(_card("a"))
+    fr.close()
+    assert _drain(fr) == ["a", "pricey"]
+
+
+def test_frontier_drops_quarantined_cards_before_the_cap(tmp_path):
+    state = ListingState(tmp_path / "s.json")
+    for n in ("sold1", "sold2", "sold3"):
+        state.quarantine(_card(n)["listing_url"], "sold")
+    fr = Frontier({"cap_listings": 3}, state)
+    for card in [_card("sold1"), _card("sold2"), _card("real"), _card("sold3")]:
+        fr.push(card)
+    fr.close()
+    assert _drain(fr) == ["real"]
+    assert fr.summary() == {"quarantined": 3, "new": 1, "released": 1}
@@ -0,0 +1,29 @@
+from x987.pipeline.prefilter import DEFER, DROP, KEEP, Prefilter
+from x987.scrapers.cars_com_extract import card_row
+
+CFG = {"min_year": 2009, "max_year": 2012, "prefilter": {"max_price_usd": 60000, "max_mileage": 90000}}
+
+
+def _card(**kw):
+    return {"source": "cars.com", "listing_url": "https://www.cars.com/vehicledetail/1/", **kw}
+
+
+def test_prefilter_verdicts():
+    pf = Prefilter(CFG)
+    assert pf.verdict(_card(year=2008)) == (DROP, "year")
+    assert pf.verdict(_card(year=2013, price_usd=30000)) == (DROP, "year")
+    assert pf.verdict(_card(year=2010, price_usd=75000)) == (DROP, "price")
+    assert pf.verdict(_card(year=2010, mileage=120000)) == (DROP, "mileage")
+    assert pf.verdict(_card(year=2010, price_usd=45000, mileage=50000)) == (KEEP, None)
+    assert pf.verdict(_card()) == (KEEP, None)  # unknown fields never drop a card
+
+    deferring = Prefilter({**CFG, "prefilter": {**CFG["prefilter"], "mode": "defer"}})
+    assert deferring.judge(_card(year=2010, price_usd=75000)) == DEFER
+    assert deferring.judge(_card(year=2007)) == DROP
+    assert deferring.stats == {"defer:price": 1, "drop:year": 1}
+
+
+def test_card_row_from_title():
+    row = card_row(_card(title="2011 Porsche Cayman S", price_usd=41990, mileage=52100, year=2011))
+    assert (row["year"], row["model"], row["trim"]) == (2011, "Cayman", "S")
+    assert row["price_usd"] == 41990 and row["vin"] is None and row["raw_options"] == []
@@ -0,0 +1,57 @@
+import asyncio
+
+from x987.utils.ratelimit import HostLimiter, RateLimiter
+
+
+def test_healthy_responses_ramp_up_rate_and_concurrency():
+    h = HostLimiter("example.com", rps=1.0, max_rps=2.0, limit=1, max_limit=3, step=0.5)
+    for _ in range(6):
+        h.in_flight += 1
+        h.feedback(0.2, status=200, now=0)
+    assert h.rps == 2.0
+    assert h.limit == 3
+
+
+def test_throttle_halves_and_cools_down():
+    h = HostLimiter("example.com", rps=2.0, min_rps=0.5, limit=4, max_limit=4, backoff_s=5.0)
+    h.in_flight = 1
+    h.feedback(0.2, status=429, now=100.0)
+    assert (h.rps, h.limit, h.cooldown_until) == (1.0, 2, 105.0)
+    h.feedback(0.2, blocked=True, now=106.0)
+    assert (h.rps, h.limit, h.cooldown_until) == (0.5, 1, 116.0)
+    h.feedback(9.0, status=200, now=120.0)  # slow
+    assert h.rps == 0.5 and h.stats["slow"] == 1
+
+
+def test_slot_caps_in_flight_per_host():
+    lim = RateLimiter({"concurrency": 2, "rate_limit": {"start_rps": 1000, "max_concurrency": 2}})
+    peak = 0
+
+    async def one(i):
+        nonlocal peak
+        async with lim.slot(f"https://www.cars.com/vehicledetail/{i}/") as t:
+            h = lim.host("https://www.cars.com/")
+            peak = max(peak, h.in_flight)
+            await asyncio.sleep(0.05)
+            t.status = 200
+
+    async def main():
+        await asyncio.gather(*(one(i) for i in range(6)))
+
+    asyncio.run(main())
+    assert peak == 2
+    assert lim.host("https://www.cars.com/").stats["requests"] == 6
+
+
+def test_ready_timeout_follows_host_latency():
+    rl = RateLimiter({"readiness": {"min_timeout_ms": 1000, "max_timeout_ms": 10000, "factor": 2.0}})
+    url = "https://www.cars.com/vehicledetail/1/"
+    assert rl.ready_timeout_s(url) == 10.0  # no history yet
+    assert rl.ready_timeout_s(url, max_s=5.0) == 5.0
+    h = rl.host(url)
+    for s in [0.2, 0.3, 0.4, 0.5, 1.5]:
+        h.feedback(s, 200)
+    assert rl.ready_timeout_s(url) == 3.0  # p90 = 1.5 s, doubled
+    h.latencies.clear()
+    h.latencies.extend([0.1] * 10)
+    assert rl.ready_timeout_s(url) == 1.0  # clamped to the minimum
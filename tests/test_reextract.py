@@ -0,0 +1,32 @@
+import pathlib
+
+from x987.pipeline import archive, reextract
+from x987.scrapers.cars_com_http import parse_detail_html
+
+FIXTURES = pathlib.Path(__file__).parent / "fixtures"
+
+
+def _save(root, run_id, url, fixture):
+    body, specs = parse_detail_html((FIXTURES / fixture).read_text(encoding="utf-8"))
+    archive.PageArchive(root, run_id).save(url, body, specs, "http")
+
+
+def test_archived_pages_latest_copy_wins(tmp_path):
+    _save(tmp_path, "20250101_000000", "https://www.cars.com/vehicledetail/1/", "cars_com_detail_sparse.html")
+    _save(tmp_path, "20250102_000000", "https://www.cars.com/vehicledetail/1/?src=x", "cars_com_detail.html")
+    _save(tmp_path, "20250101_000000", "https://www.cars.com/vehicledetail/2/", "cars_com_detail_sparse.html")
+
+    latest = archive.archived_pages(root=tmp_path)
+    assert [p.parent.name for p in latest].count("20250102_000000") == 1
+    assert len(latest) == 2
+    assert len(archive.archived_pages("20250101_000000", root=tmp_path)) == 2
+
+
+def test_run_reextract_uses_archive(tmp_path, monkeypatch):
+    _save(tmp_path, "20250102_000000", "https://www.cars.com/vehicledetail/1/", "cars_com_detail.html")
+    monkeypatch.setattr(archive, "archive_root", lambda: tmp_path)
+
+    rows = reextract.run_reextract({"debug": True, "state": {"enabled": False}, "archive": {"workers": 1}})
+    assert len(rows) == 1
+    assert rows[0]["vin"] == "WP0AB2A83AU780123"
+    assert rows[0]["_fetch"] == "archive:20250102_000000"
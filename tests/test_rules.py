@@ -0,0 +1,46 @@
+from x987.scrapers.cars_com_extract import BUILTIN_RULES, DEFAULT_RULES, Extractor
+from x987.scrapers.rules import load_rules
+
+BODY = "2010 Porsche Cayman S\n$38,990\nOdometer 45,123\nAt a glance\nGearbox: 6-Speed Manual\nVIN WP0AB2A85AU720001"
+
+
+def _cfg(tmp_path, text=None):
+    if text is not None:
+        (tmp_path / "cars_com.toml").write_text(text, encoding="utf-8")
+    return {"_paths": {"USER_RULES": str(tmp_path)}}
+
+
+def test_no_rules_file_uses_builtins(tmp_path):
+    rules = load_rules("cars.com", _cfg(tmp_path), DEFAULT_RULES)
+    assert rules.vin.pattern == BUILTIN_RULES.vin.pattern
+    assert rules.labels["vin"] == ("VIN",)
+
+
+def test_rules_file_extends_labels_regexes_and_sections(tmp_path):
+    cfg = _cfg(
+        tmp_path,
+        """
+[labels]
+mileage = ["Odometer"]
+[regex]
+mileage = 'odometer\\s+(\\d[\\d,]+)'
+transmission_label = 'gearbox\\s*:?\\s*([A-Za-z0-9\\- /]+)'
+vin = 'not (valid'
+[sections]
+specs = ["At a glance"]
+""",
+    )
+    row = Extractor(cfg).extract("u", BODY, {})
+    assert row["mileage"] == 45123
+    assert row["transmission_raw"] == "6-Speed Manual"
+    assert row["vin"] == "WP0AB2A85AU720001"  # malformed regex: built-in kept
+    assert Extractor(cfg).extract("u", "", {"Odometer": "12,000 mi."})["mileage"] == 12000
+
+
+def test_rules_cached_by_content(tmp_path):
+    cfg = _cfg(tmp_path, "[labels]\nvin = ['VIN #']\n")
+    first = load_rules("cars.com", cfg, DEFAULT_RULES)
+    assert load_rules("cars.com", cfg, DEFAULT_RULES) is first
+    (tmp_path / "cars_com.toml").write_text("[labels]\nvin = ['Vehicle ID']\n", encoding="utf-8")
+    changed = load_rules("cars.com", cfg, DEFAULT_RULES)
+    assert changed is not first and changed.labels["vin"] == ("Vehicle ID", "VIN")
@@ -0,0 +1,60 @@
+import json
+
+from conftest import StubSession
+
+from x987.pipeline import scrape
+from x987.pipeline.seen import SeenSet
+from x987.pipeline.state import ListingState
+
+
+def _show(page, url):
+    # one search page listing five cars.com links; detail pages show one car
+    if "autotempest" in url:
+        links = [] if "page=" in url else [f"https://www.cars.com/vehicledetail/{i}/" for i in range(5)]
+        page.links = [[u, "2010 Porsche Cayman\n$31,500\n45,000 mi"] for u in links]
+    else:
+        page.body = f"2010 Porsche Cayman S\n$31,500\n45,000 miles\n{url}"
+
+
+def test_only_scraped_listings_are_remembered(tmp_path, monkeypatch):
+    seen = SeenSet(tmp_path / "seen.json")
+    monkeypatch.setattr(scrape, "incremental_seen", lambda cfg: seen)
+    cfg = {
+        "search_urls": ["https://www.autotempest.com/results?make=porsche"],
+        "cap_listings": 2,
+        "collect": {"xhr": False, "incremental": True, "reveal_fallback": False},
+        "rate_limit": {"start_rps": 1000, "max_rps": 1000},
+        "http": {"enabled": False},
+        "state": {"enabled": False},
+        "extract": {"processes": False},
+    }
+    collected, rows = scrape.run_collect_scrape(cfg, StubSession(on_goto=_show))
+
+    assert len(collected) == 5 and len(rows) == 2
+    # the three cards past the cap were never scraped: the next run must collect them again
+    saved = json.loads((tmp_path / "seen.json").read_text(encoding="utf-8"))
+    assert len(saved) == 2 and all(r["listing_url"] in seen for r in rows)
+
+
+def test_incremental_run_reports_known_listings_it_did_not_reach(tmp_path, monkeypatch):
+    seen = SeenSet(tmp_path / "seen.json")
+    state = ListingState(tmp_path / "state.json")
+    old = "https://www.cars.com/vehicledetail/{}/"
+    for n, price in ((97, 30000), (98, 31000), (99, 32000)):
+        seen.add(old.format(n))
+        state.record({"listing_url": old.format(n), "price_usd": price}, now=0 if n == 97 else None)
+    state.quarantine(old.format(98), "sold")
+    monkeypatch.setattr(scrape, "incremental_seen", lambda cfg: seen)
+    monkeypatch.setattr(scrape, "_load_state", lambda cfg: state)
+    cfg = {
+        "search_urls": ["https://www.autotempest.com/results?make=porsche"],
+        "cap_listings": 2,
+        "collect": {"xhr": False, "incremental": True, "reveal_fallback": False},
+        "rate_limit": {"start_rps": 1000, "max_rps": 1000},
+        "http": {"enabled": False},
+        "extract": {"processes": False},
+    }
+    _, rows = scrape.run_collect_scrape(cfg, StubSession(on_goto=_show))
+
+    # two scraped this run, plus the still-listed known car; not the sold one or the one too old to trust
+    assert len(rows) == 3 and rows[-1] == {"listing_url": old.format(99), "price_usd": 32000}
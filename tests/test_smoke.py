@@ -1,7 +1,8 @@
 ﻿def test_smoke_import():
     import x987  # noqa: F401
 
-def test_doctor_runs():
+def test_doctor_runs(monkeypatch):
     # Importing main entry and doing a dry run that shouldn't error
     import runpy
+    monkeypatch.setattr("sys.argv", ["x987"])  # not pytest's own arguments
     runpy.run_module("x987", run_name="__main__")
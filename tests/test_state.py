@@ -0,0 +1,73 @@
+import json
+
+from x987.pipeline.state import ListingState
+
+
+def _row(**kw):
+    row = {
+        "source": "cars.com",
+        "listing_url": "https://www.cars.com/vehicledetail/123/?x=1",
+        "price_usd": 30000,
+        "mileage": 50000,
+        "vin": "WP0AB2A83AU780123",
+        "_fetch": "http",
+    }
+    row.update(kw)
+    return row
+
+
+def test_record_freshness_and_roundtrip(tmp_path):
+    st = ListingState(tmp_path / "state.json", ttl_s=3600)
+    st.record(_row(), now=1000)
+    rec = st.get("https://WWW.cars.com/vehicledetail/123")
+    assert rec["row"]["price_usd"] == 30000
+    assert "_fetch" not in rec["row"]
+    assert st.by_vin("wp0ab2a83au780123") is rec
+    assert st.is_fresh(rec, now=1000 + 3599)
+    assert not st.is_fresh(rec, now=1000 + 3600)
+
+    st.record({"source": "cars.com", "listing_url": "https://x/err", "error": "boom"})
+    st.save()
+    data = json.loads((tmp_path / "state.json").read_text(encoding="utf-8"))
+    assert list(data["listings"]) == ["https://www.cars.com/vehicledetail/123"]
+
+
+def test_unchanged_compares_fingerprint(tmp_path):
+    st = ListingState(tmp_path / "state.json")
+    st.record(_row(), now=1000)
+    rec = st.get(_row()["listing_url"])
+    assert st.unchanged(rec, _row(exterior_color="Guards Red"))
+    assert not st.unchanged(rec, _row(price_usd=28500))
+    assert not st.unchanged(rec, _row(price_usd=None))
+
+
+def test_quarantine_blocked_expires_sold_does_not(tmp_path):
+    st = ListingState(tmp_path / "state.json", blocked_retry_s=3600)
+    st.quarantine("https://www.cars.com/vehicledetail/1/", "blocked", now=1000)
+    st.quarantine("https://www.cars.com/vehicledetail/2/", "sold", now=1000)
+    blocked = st.get("https://www.cars.com/vehicledetail/1")
+    sold = st.get("https://www.cars.com/vehicledetail/2/")
+    assert st.is_quarantined(blocked, now=2000) and not st.is_quarantined(blocked, now=5000)
+    assert st.is_quarantined(sold, now=10**9)
+    assert not st.is_fresh(sold)
+
+    st.record(_row(listing_url="https://www.cars.com/vehicledetail/1/"))
+    assert not st.is_quarantined(st.get("https://www.cars.com/vehicledetail/1/"))
+
+
+def test_relisted_vin_carries_history_to_the_new_url(tmp_path):
+    st = ListingState(tmp_path / "state.json")
+    vin = "WP0AB2A85AU720001"  # valid check digit
+    st.record(_row(listing_url="https://www.cars.com/vehicledetail/1/", vin=vin), now=1000)
+    moved = st.record(_row(listing_url="https://www.cars.com/vehicledetail/2/", vin=vin.lower()), now=5000)
+
+    assert moved == "https://www.cars.com/vehicledetail/1"
+    new = st.get("https://www.cars.com/vehicledetail/2/")
+    assert new["first_seen"] == 1000 and new["relisted_from"] == moved
+    assert st.by_vin(vin) is new
+    old = st.get(moved)
+    assert old["row"] is None and st.is_quarantined(old)
+
+    # a garbled VIN never links two listings
+    assert st.record(_row(listing_url="https://www.cars.com/vehicledetail/3/"), now=6000) is None
+    assert st.record(_row(listing_url="https://www.cars.com/vehicledetail/4/"), now=7000) is None
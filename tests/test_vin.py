@@ -0,0 +1,40 @@
+from x987.scrapers.cars_com_extract import Extractor
+from x987.utils.vin import check_digit, decode, dedupe_key, is_valid, model_year
+
+CAYMAN_S_2010 = "WP0AB2A85AU720001"
+CAYMAN_2009 = "WP0AA29839U760001"
+
+
+def test_check_digit():
+    assert check_digit("1M8GDM9AXKP042788") == "X"  # the standard worked example
+    assert is_valid(CAYMAN_S_2010)
+    assert not is_valid("WP0AB2A86AU720001")  # one digit off
+    assert not is_valid("WP0AB2A8OAU72000")  # letter O, 16 chars
+
+
+def test_model_year_cycle():
+    assert model_year(CAYMAN_S_2010) == 2010  # position 7 is a letter: 2010+ cycle
+    assert model_year(CAYMAN_2009) == 2009
+
+
+def test_decode_cayman_and_boxster():
+    d = decode(CAYMAN_S_2010)
+    assert (d["year"], d["model"], d["generation"], d["body_style"], d["trim"]) == (2010, "Cayman", "987", "Coupe", "S")
+    assert decode(CAYMAN_2009)["trim"] == "Base"
+    assert decode("WP0CB29856U730001")["model"] == "Boxster"
+    assert decode("WP0AB2A86AU720001") is None  # bad check digit: nothing decoded
+
+
+def test_dedupe_key():
+    assert dedupe_key(" wp0ab2a85au720001 ") == CAYMAN_S_2010
+    assert dedupe_key("WP0AB2A86AU720001") is None
+    assert dedupe_key("WP0ZZZ98ZAS700001") == "WP0ZZZ98ZAS700001"  # rest-of-world VINs carry no check digit
+
+
+def test_extract_prefers_vin_over_title_heuristics():
+    body = f"2010 Porsche Cayman\n$31,500\n45,000 miles\nBasics\nVIN\n{CAYMAN_S_2010}\nEngine\n2.9L H6"
+    row = Extractor({}).extract("u", body, {})
+    assert (row["year"], row["model"], row["trim"], row["body_style"]) == (2010, "Cayman", "S", "Coupe")
+    # special editions are not in the VIN; the title still names them
+    row = Extractor({}).extract("u", body.replace("Cayman\n", "Cayman R\n", 1), {})
+    assert row["trim"] == "R"
@@ -3,8 +3,10 @@ from .settings import load_config, get_paths
 from .doctor import run_doctor
 from .utils.io import timestamp_run_id, safe_write_csv, write_latest_alias
 from .utils import log
-from .pipeline.collect import run_collect
-from .pipeline.scrape import run_scrape
+from .pipeline.scrape import run_collect_scrape
+from .pipeline.checkpoint import checkpoint_path, discard_checkpoint
+from .pipeline.reextract import run_reextract
+from .utils.browser import BrowserSession
 from .pipeline.transform import run_transform
 from .pipeline.dedupe import run_dedupe
 from .pipeline.fairvalue import run_fairvalue
@@ -16,30 +18,65 @@ from .pipeline.cache import load_latest_normalized_rows
 # options
 from .pipeline.options_v2 import recompute_options_v2
 from .pipeline.options import recompute_top5_options
+import argparse
 import os
+import sys
 
 
-def main():
+def _parse_args(argv):
+    ap = argparse.ArgumentParser(prog="x987")
+    ap.add_argument(
+        "--reextract",
+        nargs="?",
+        const="",
+        metavar="RUN_ID",
+        help="rebuild rows from archived pages (all runs, or only RUN_ID) instead of scraping",
+    )
+    ap.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        help="continue an interrupted run: keep its checkpointed rows and scrape only the rest",
+    )
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
     cfg = load_config()
     run_doctor(cfg)
     paths = get_paths()
-    run_id = timestamp_run_id()
+    # A resumed run keeps its id so checkpoint, archive and output files line up
+    if args.resume and not checkpoint_path(args.resume).exists():
+        raise SystemExit(f"[x987] No checkpoint for run {args.resume!r} (finished, or never started)")
+    run_id = args.resume or timestamp_run_id()
 
     use_cached = bool((cfg.get("dev") or {}).get("use_cached_normalized", False))
 
-    if use_cached:
+    reextract = args.reextract is not None
+
+    if use_cached and not reextract:
         log.step("cached")
         deduped = load_latest_normalized_rows(cfg)
         log.ok(path=os.path.join(paths["NORM_DIR"], "latest.csv"), count=len(deduped))
     else:
-        # Collect â†’ Scrape
-        coll = run_collect(cfg)
-        scraped = run_scrape(coll, cfg)
+        if reextract:
+            # Archived pages â†’ rows with the current extraction code (no browser)
+            scraped = run_reextract(cfg, args.reextract or None)
+            tag = "RX"
+        else:
+            # Collect â†’ Scrape
+            # One headless browser for the whole run (opt into headed via [browser] headed=true)
+            with BrowserSession(cfg) as session:
+                _, scraped = run_collect_scrape(cfg, session, run_id)
+            tag = "AT"
 
         # Persist raw scrape and alias latest
-        raw_out = os.path.join(paths["RAW_DIR"], f"scrape_{run_id}_AT_n{len(scraped):03d}.csv")
-        safe_write_csv(scraped, raw_out)
-        write_latest_alias(raw_out, os.path.join(paths["RAW_DIR"], "latest.csv"))
+        if scraped:
+            raw_out = os.path.join(paths["RAW_DIR"], f"scrape_{run_id}_{tag}_n{len(scraped):03d}.csv")
+            safe_write_csv(scraped, raw_out)
+            write_latest_alias(raw_out, os.path.join(paths["RAW_DIR"], "latest.csv"))
+        if not reextract:
+            discard_checkpoint(run_id)  # the scrape finished and its rows are saved
 
         # Ingest latest raw + manual CSVs
         raw_rows = load_raw_and_manual()
@@ -1,105 +1,300 @@
-﻿from playwright.sync_api import sync_playwright
-
-BLOCK_URL_SUBSTR = [
-    "googletagmanager.com",
-    "google-analytics.com",
-    "doubleclick.net",
-    "facebook.net",
-    "adservice.google",
-    "adsystem",
-    "scorecardresearch",
-    "criteo",
-    "hotjar",
-    "optimizely",
-    "segment.io",
-    "newrelic",
-    "snowplow",
-]
-
-
-def _install_blocking(context, cfg):
-    nw = cfg.get("network", {}) or {}
-    block_types = set()
-    if nw.get("block_images", True):
-        block_types.add("image")
-    if nw.get("block_media", True):
-        block_types.add("media")
-    if nw.get("block_fonts", True):
-        block_types.add("font")
-    if nw.get("block_stylesheets", True):
-        block_types.add("stylesheet")
-    block_analytics = nw.get("block_analytics", True)
-
-    def _maybe_block(route):
-        req = route.request
-        if req.resource_type in block_types:
-            return route.abort()
-        if block_analytics and any(s in req.url for s in BLOCK_URL_SUBSTR):
-            return route.abort()
-        return route.continue_()
-
-    context.route("**/*", _maybe_block)
-
-
-def _auto_reveal(page, cfg):
+﻿import asyncio
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from ..scrapers.cars_com_extract import title_trim
+from ..utils import log
+from ..utils.browser import ready_selector, wait_ready
+from ..utils.ratelimit import RateLimiter
+
+LINK_SELECTOR = 'a[href*="cars.com/vehicledetail"]'
+
+
+def with_params(url, params):
+    """`url` with query parameters set from `params`; a None value removes the parameter."""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in params]
+    query += [(k, str(v)) for k, v in params.items() if v is not None]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def page_url(url, n, param="page"):
+    """`url` with its result-page parameter set to `n` (page 1 is the bare URL)."""
+    return with_params(url, {param: n if n > 1 else None})
+
+
+# Key spellings seen in results JSON; the first present one wins
+_URL_KEYS = ("listingUrl", "listing_url", "vdpUrl", "detailUrl", "url", "link", "href")
+_PRICE_KEYS = ("price", "priceUsd", "listPrice", "price_usd")
+_MILES_KEYS = ("mileage", "miles", "odometer")
+_YEAR_KEYS = ("year", "modelYear")
+_TITLE_KEYS = ("title", "name", "heading")
+_NUM_RE = re.compile(r"\d[\d,]*")
+_CARD_PRICE_RE = re.compile(r"\$\s?(\d{1,3}(?:,\d{3})+|\d{4,6})\b")
+_CARD_MILES_RE = re.compile(r"\b(\d{1,3}(?:,\d{3})+|\d{1,6})\s*(?:mi|miles)\b", re.I)
+_CARD_TITLE_RE = re.compile(r"^\s*((?:19|20)\d{2}\s+\S.*?)\s*$", re.M)
+
+
+def _first(d, keys):
+    for k in keys:
+        v = d.get(k)
+        if v not in (None, ""):
+            return v
+    return None
+
+
+def _int(v):
+    if isinstance(v, bool):
+        return None
+    if isinstance(v, (int, float)):
+        return int(v)
+    m = _NUM_RE.search(str(v)) if v is not None else None
+    return int(m.group(0).replace(",", "")) if m else None
+
+
+def listings_from_json(data):
+    """
+    Walk a results JSON payload and return one card per object that links to a
+    cars.com detail page: {source, listing_url, price_usd, mileage, year, title, trim}.
+    """
+    out = []
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+            continue
+        if not isinstance(node, dict):
+            continue
+        url = next(
+            (v for k in _URL_KEYS if isinstance(v := node.get(k), str) and "cars.com/vehicledetail" in v),
+            None,
+        )
+        if url:
+            title = _first(node, _TITLE_KEYS)
+            out.append(
+                {
+                    "source": "cars.com",
+                    "listing_url": url.split("?")[0],
+                    "price_usd": _int(_first(node, _PRICE_KEYS)),
+                    "mileage": _int(_first(node, _MILES_KEYS)),
+                    "year": _int(_first(node, _YEAR_KEYS)),
+                    "title": str(title) if title is not None else None,
+                    "trim": title_trim(str(title)) if title is not None else None,
+                }
+            )
+        stack.extend(reversed([v for v in node.values() if isinstance(v, (dict, list))]))
+    return out
+
+
+def _find(rx, text):
+    m = rx.search(text or "")
+    return m.group(1) if m else None
+
+
+def card_from_text(url, text):
+    """Card fields parsed from a rendered result card's text (DOM fallback for the JSON cards)."""
+    title = _find(_CARD_TITLE_RE, text)
+    return {
+        "source": "cars.com",
+        "listing_url": url,
+        "price_usd": _int(_find(_CARD_PRICE_RE, text)),
+        "mileage": _int(_find(_CARD_MILES_RE, text)),
+        "year": _int(title[:4]) if title else None,
+        "title": title,
+        "trim": title_trim(title),
+    }
+
+
+class _XhrCapture:
+    """Collects listing cards from the page's JSON responses for the current results page."""
+
+    def __init__(self, page, match):
+        self.match = match
+        self.items = {}
+        self.ready = asyncio.Event()
+        page.on("response", self._on_response)
+
+    def reset(self):
+        self.items = {}
+        self.ready.clear()
+
+    async def _on_response(self, resp):
+        try:
+            if resp.request.resource_type not in ("xhr", "fetch"):
+                return
+            if self.match and not any(m in resp.url for m in self.match):
+                return
+            if "json" not in (resp.headers.get("content-type") or ""):
+                return
+            cards = listings_from_json(await resp.json())
+        except Exception:
+            return  # page navigated away or body was not JSON
+        for card in cards:
+            self.items.setdefault(card["listing_url"], card)
+        if cards:
+            self.ready.set()
+
+
+# One round trip: absolute hrefs of listing anchors (query/fragment stripped, first-seen order)
+# with the text of the result card around each, for card-level price/mileage/year
+HARVEST_JS = r"""
+sel => {
+  const out = new Map();
+  for (const a of document.querySelectorAll(sel)) {
+    const href = (a.href || '').split(/[?#]/)[0];
+    if (!href.includes('cars.com/vehicledetail') || out.has(href)) continue;
+    const card = a.closest('li, article, [class*="result"], [class*="listing"]');
+    out.set(href, ((card || a).innerText || '').slice(0, 600));
+  }
+  return [...out];
+}
+"""
+
+_SCROLL_COUNT_JS = "sel => { window.scrollTo(0, document.body.scrollHeight); return document.querySelectorAll(sel).length; }"
+
+_MORE_LINKS_JS = "([sel, n]) => document.querySelectorAll(sel).length > n"
+
+
+async def _wait_more(page, count, timeout_ms=1500):
+    """Wait until more than `count` listing links exist; False if none arrive in time."""
+    try:
+        await page.wait_for_function(_MORE_LINKS_JS, arg=[LINK_SELECTOR, count], timeout=timeout_ms)
+        return True
+    except Exception:
+        return False
+
+
+async def _auto_reveal(page, cfg):
     nw = cfg.get("network", {}) or {}
     max_clicks = int(nw.get("max_clicks_more", 6))
     max_scrolls = int(nw.get("max_scroll_rounds", 8))
+    links = page.locator(LINK_SELECTOR)
 
     # Try clicking the "More Cars.com Results" button up to N times
     for _ in range(max_clicks):
         try:
             loc = page.locator(r"text=/More\s+Cars\.com\s+Results/i").first
-            if loc.count() > 0:
-                loc.click(timeout=1000)
-                page.wait_for_timeout(300)
+            if await loc.count() > 0:
+                before = await links.count()
+                await loc.click(timeout=1000)
+                await _wait_more(page, before)
             else:
                 break
         except Exception:
             break
 
-    # Then auto-scroll to bottom a few rounds to trigger lazy lists
-    last_count = -1
+    # Then auto-scroll to bottom a few rounds to trigger lazy lists; stop once nothing new loads
     for _ in range(max_scrolls):
-        page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-        page.wait_for_timeout(300)
-        # If no new links appear, stop
-        count = page.locator('a[href*="cars.com/vehicledetail"]').count()
-        if count == last_count:
+        before = await page.evaluate(_SCROLL_COUNT_JS, LINK_SELECTOR)
+        if not await _wait_more(page, before):
             break
-        last_count = count
 
 
-def _collect_from_page(page):
-    # Collect Cars.com listing links
-    links = page.locator('a[href*="cars.com/vehicledetail"]')
-    urls = set()
+async def _collect_from_page(page):
+    # Collect Cars.com listing cards in a single evaluate (deduped, page order)
     try:
-        n = links.count()
-        for i in range(n):
-            href = links.nth(i).get_attribute("href")
-            if href and "cars.com/vehicledetail" in href:
-                urls.add(href.split("?")[0])
+        pairs = await page.evaluate(HARVEST_JS, LINK_SELECTOR)
     except Exception:
-        pass
-    return [{"source": "cars.com", "listing_url": u} for u in urls]
+        pairs = []
+    return [card_from_text(url, text) for url, text in pairs]
 
 
-def collect_autotempest(urls, cfg):
-    out = []
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        context = browser.new_context(ignore_https_errors=True)
-        context.set_default_timeout(10_000)
-        _install_blocking(context, cfg)
-        page = context.new_page()
-
-        for u in urls:
-            page.goto(u, wait_until="domcontentloaded")
-            page.wait_for_timeout(500)
-            _auto_reveal(page, cfg)
-            out += _collect_from_page(page)
-
-        browser.close()
-    return out
+async def _load(page, url, limiter, max_ms, capture=None, selector=LINK_SELECTOR):
+    # Wait budget follows the host's observed latency (at most max_ms)
+    timeout_s = limiter.ready_timeout_s(url, max_s=max_ms / 1000)
+    async with limiter.slot(url) as t:
+        resp = await page.goto(url, wait_until="domcontentloaded")
+        t.status = resp.status if resp is not None else None
+    # Results arrive by XHR and render client-side; wait for whichever shows up first
+    # (listing JSON or the ready selector) instead of a fixed sleep. The page is not
+    # stopped afterwards: the reveal fallback still needs it live.
+    waits = [asyncio.ensure_future(wait_ready(page, selector, timeout_s, stop=False))]
+    if capture is not None:
+        waits.append(asyncio.ensure_future(capture.ready.wait()))
+    done, pending = await asyncio.wait(waits, timeout=timeout_s, return_when=asyncio.FIRST_COMPLETED)
+    for w in pending:
+        w.cancel()
+
+
+async def _harvest(page, capture):
+    """Cards from the captured listing JSON, or anchors from the DOM when none came by XHR."""
+    if capture is not None and capture.items:
+        return list(capture.items.values())
+    return await _collect_from_page(page)
+
+
+async def _walk_search(url, cfg, context, limiter, emit, known=None):
+    """
+    Enumerate the result pages of one search URL (`?page=2`, `?page=3`, ...) until
+    a page adds no new listings or fails to load. If the site ignores the page parameter, fall back
+    to clicking "More results" / scrolling on the first page.
+
+    With `known` (a SeenSet) results are sorted newest first and paging stops once
+    `stop_after_known` listings in a row were already seen on earlier runs.
+    """
+    cc = cfg.get("collect") or {}
+    param = cc.get("page_param", "page")
+    max_pages = max(1, int(cc.get("max_pages", 10)))
+    timeout_ms = int(cc.get("results_timeout_ms", 8000))
+    selector = ready_selector(url, cfg) or LINK_SELECTOR
+    stop_after = max(1, int(cc.get("stop_after_known", 10)))
+    if known is not None:
+        url = with_params(url, {cc.get("sort_param", "sort"): cc.get("newest_sort", "date_listed")})
+    seen = {}
+    known_run = 0
+    page = await context.new_page()
+    capture = _XhrCapture(page, cc.get("xhr_match") or []) if cc.get("xhr", True) else None
+    try:
+        for n in range(1, max_pages + 1):
+            if capture is not None:
+                capture.reset()
+            try:
+                await _load(page, page_url(url, n, param), limiter, timeout_ms, capture, selector)
+            except Exception as e:
+                # one bad results page ends this search only; keep what it already found
+                log.warn("Results page failed; stopping this search", search=url, page=n, error=str(e)[:200])
+                break
+            found = [f for f in await _harvest(page, capture) if f["listing_url"] not in seen]
+            last = not found
+            if n == 2 and not found and cc.get("reveal_fallback", True):
+                # page 2 repeated page 1: pagination is not honoured here
+                await _auto_reveal(page, cfg)
+                merged = {}
+                for f in await _harvest(page, capture) + await _collect_from_page(page):
+                    if f["listing_url"] not in seen:
+                        merged.setdefault(f["listing_url"], f)  # XHR cards (with price etc.) win
+                found = list(merged.values())
+            for item in found:
+                seen[item["listing_url"]] = item
+                await emit(item)
+                if known is not None:
+                    known_run = known_run + 1 if item["listing_url"] in known else 0
+            if known_run >= stop_after:
+                break  # caught up with earlier runs; older results are all known
+            if last:
+                break
+    finally:
+        await page.close()
+    return list(seen.values())
+
+
+async def collect_autotempest_async(urls, cfg, context, sink=None, limiter=None, known=None):
+    """
+    Walk every search URL in parallel, one page of `context` (the BrowserSession,
+    whose new_page() attaches request blocking first) each, paging through
+    results by URL. When `sink` (an asyncio.Queue) is given, listings are pushed
+    as soon as their results page is harvested so a consumer can start scraping
+    while further result pages load. Returns listings in search-URL order.
+
+    Passing `known` (pipeline/seen.py SeenSet) turns on incremental newest-first
+    collection; the collector only reads it, and the caller adds listings once
+    they are settled (scraped, dropped or gone; pipeline/scrape.py).
+    """
+    limiter = limiter or RateLimiter(cfg)
+
+    async def _emit(item):
+        if sink is not None:
+            await sink.put(item)
 
+    per_search = await asyncio.gather(*(_walk_search(u, cfg, context, limiter, _emit, known) for u in urls))
+    return [item for found in per_search for item in found]
@@ -5,7 +5,7 @@ from .settings import get_paths
 
 def run_doctor(cfg):
     problems = []
-    for pkg in ["playwright", "rich", "pydantic", "rapidfuzz", "tomli"]:
+    for pkg in ["playwright", "rich", "pydantic", "rapidfuzz", "tomli", "psutil"]:
         if importlib.util.find_spec(pkg) is None:
             problems.append(f"Missing package: {pkg}")
     paths = get_paths()
@@ -0,0 +1,68 @@
+# FILE: x987/pipeline/archive.py
+# CONTRACT: gzip-compressed page archive, RAW_DIR/pages/<run_id>/<url-hash>.json.gz holding the
+# body text and <dt>/<dd> spec map each row was extracted from; input for offline re-extraction
+import gzip
+import hashlib
+import json
+import os
+import pathlib
+import time
+from ..settings import get_paths
+from ..utils.text import canonical_url
+
+ARCHIVE_DIR = "pages"
+
+
+def archive_root():
+    return pathlib.Path(get_paths()["RAW_DIR"]) / ARCHIVE_DIR
+
+
+def page_key(url):
+    return hashlib.sha1(canonical_url(url).encode("utf-8")).hexdigest()[:20]
+
+
+class PageArchive:
+    def __init__(self, root, run_id):
+        self.run_id = run_id
+        self.dir = pathlib.Path(root) / run_id
+        self.dir.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def for_run(cls, run_id):
+        return cls(archive_root(), run_id)
+
+    def save(self, url, body, specs, how):
+        fp = self.dir / f"{page_key(url)}.json.gz"
+        tmp = fp.with_suffix(".tmp")
+        payload = {
+            "url": url,
+            "run_id": self.run_id,
+            "fetched_at": int(time.time()),
+            "how": how,
+            "body": body,
+            "specs": specs,
+        }
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp, fp)
+
+
+def archived_pages(run_id=None, root=None):
+    """
+    Paths of archived pages, one per listing. With `run_id`, only that run's
+    pages; otherwise the newest archived copy of every listing across runs.
+    """
+    root = pathlib.Path(root) if root else archive_root()
+    if not root.exists():
+        return []
+    runs = [root / run_id] if run_id else sorted(p for p in root.iterdir() if p.is_dir())
+    latest = {}
+    for run_dir in runs:
+        for fp in run_dir.glob("*.json.gz"):
+            latest[fp.name] = fp  # later run ids sort last and win
+    return [latest[k] for k in sorted(latest)]
+
+
+def load_page(fp):
+    with gzip.open(fp, "rt", encoding="utf-8") as f:
+        return json.load(f)
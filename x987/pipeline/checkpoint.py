@@ -0,0 +1,80 @@
+# FILE: x987/pipeline/checkpoint.py
+# CONTRACT: append-only JSONL of scraped rows per run (RAW_DIR/checkpoints/scrape_<run_id>.jsonl)
+# so an interrupted scrape can be resumed with `--resume <run_id>`; removed once the run finishes
+import json
+import os
+import pathlib
+from ..settings import get_paths
+from ..utils.text import canonical_url
+
+CHECKPOINT_DIR = "checkpoints"
+
+
+def checkpoint_path(run_id):
+    return pathlib.Path(get_paths()["RAW_DIR"]) / CHECKPOINT_DIR / f"scrape_{run_id}.jsonl"
+
+
+def discard_checkpoint(run_id):
+    """Delete a finished run's checkpoint; its rows are in the raw CSV by then."""
+    checkpoint_path(run_id).unlink(missing_ok=True)
+
+
+class ScrapeCheckpoint:
+    def __init__(self, path, every=10):
+        self.path = pathlib.Path(path)
+        self.every = max(1, int(every))
+        self._pending = []
+        self.rows = self._load()
+        # error rows are retried on resume; only good rows count as done
+        self._done = {canonical_url(r.get("listing_url")) for r in self.rows if not r.get("error")}
+
+    @classmethod
+    def for_run(cls, run_id, cfg):
+        every = (cfg.get("checkpoint") or {}).get("every", 10)
+        path = checkpoint_path(run_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return cls(path, every)
+
+    def _load(self):
+        rows = []
+        if not self.path.exists():
+            return rows
+        good = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    break  # torn last line from a crash mid-write
+                good += len(line)
+        if good != self.path.stat().st_size:
+            # drop the torn tail so the next append starts on a clean line
+            with open(self.path, "r+b") as f:
+                f.truncate(good)
+        return rows
+
+    def done_rows(self):
+        """Rows already scraped successfully by earlier attempts of this run (last copy per URL)."""
+        by_url = {}
+        for r in self.rows:
+            if not r.get("error"):
+                by_url[canonical_url(r.get("listing_url"))] = r
+        return list(by_url.values())
+
+    def is_done(self, url):
+        return canonical_url(url) in self._done
+
+    def add(self, row):
+        self._pending.append(row)
+        if len(self._pending) >= self.every:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            for row in self._pending:
+                f.write(json.dumps(row, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._pending = []
@@ -1,5 +1,6 @@
 from ..schema import completeness_score
 from ..utils import log
+from ..utils.vin import dedupe_key
 
 
 def run_dedupe(rows):
@@ -7,10 +8,11 @@ def run_dedupe(rows):
     by_vin = {}
     no_vin = []
     for r in rows:
-        if r.vin:
-            prev = by_vin.get(r.vin)
+        key = dedupe_key(r.vin)  # case/spacing-insensitive; garbled VINs are not merged
+        if key:
+            prev = by_vin.get(key)
             if not prev or completeness_score(r) > completeness_score(prev):
-                by_vin[r.vin] = r
+                by_vin[key] = r
         else:
             no_vin.append(r)
     out = list(by_vin.values()) + no_vin
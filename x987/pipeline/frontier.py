@@ -0,0 +1,98 @@
+# FILE: x987/pipeline/frontier.py
+# CONTRACT: priority queue between the collector and the scraper; releases the most valuable
+# listings first (new > repriced > stale > rest), drops quarantined ones and stops at cap_listings
+# or [frontier] time_budget_s
+import asyncio
+import heapq
+import itertools
+import time
+from collections import Counter
+
+NEW, REPRICED, STALE, REST = range(4)
+_NAMES = {NEW: "new", REPRICED: "repriced", STALE: "stale", REST: "rest"}
+
+
+class Frontier:
+    """
+    Cards are `push`ed as the collector finds them and `pump`ed into the scraper's
+    source queue one at a time. The scraper pulls with backpressure, so each
+    release picks the best card available at that moment rather than the oldest.
+    """
+
+    def __init__(self, cfg, state=None):
+        fr = cfg.get("frontier") or {}
+        self.cap = int(cfg.get("cap_listings", 0) or 0)  # 0 = no cap
+        self.budget_s = float(fr.get("time_budget_s", 0) or 0)  # 0 = no budget
+        self.state = state
+        self.started = time.monotonic()
+        self.released = 0
+        self.stats = Counter()
+        self._heap = []
+        self._seq = itertools.count()
+        self._seen = set()
+        self._closed = False
+        self._wake = asyncio.Event()
+
+    def priority(self, card):
+        rec = self.state.get(card["listing_url"]) if self.state is not None else None
+        if rec is None:
+            return NEW
+        price = card.get("price_usd")
+        stored = (rec.get("row") or {}).get("price_usd")
+        if price is not None and stored is not None and price != stored:
+            return REPRICED
+        if not self.state.is_fresh(rec):
+            return STALE
+        return REST
+
+    def push(self, card, demote=False):
+        """Queue one card; `demote` sorts it after every non-demoted card (prefilter "defer")."""
+        url = card["listing_url"]
+        if url in self._seen:
+            return
+        self._seen.add(url)
+        if self.state is not None and self.state.is_quarantined(self.state.get(url)):
+            # sold / removed / relisted / recently blocked: never worth a cap slot
+            self.stats["quarantined"] += 1
+            return
+        prio = self.priority(card)
+        self.stats[_NAMES[prio]] += 1
+        heapq.heappush(self._heap, (prio + (len(_NAMES) if demote else 0), next(self._seq), card))
+        self._wake.set()
+
+    def close(self):
+        """No more cards are coming."""
+        self._closed = True
+        self._wake.set()
+
+    def exhausted(self):
+        if self.cap and self.released >= self.cap:
+            return "cap"
+        if self.budget_s and time.monotonic() - self.started >= self.budget_s:
+            return "budget"
+        return None
+
+    async def _pop(self):
+        while not self._heap:
+            if self._closed:
+                return None
+            self._wake.clear()
+            await self._wake.wait()
+        return heapq.heappop(self._heap)[2]
+
+    async def pump(self, out):
+        """Release cards into `out` (an asyncio.Queue) until closed and empty, capped or out of time."""
+        try:
+            while (card := await self._pop()) is not None:
+                stop = self.exhausted()
+                if stop:
+                    self.stats[f"skipped_{stop}"] += 1 + len(self._heap)
+                    self._heap.clear()
+                    continue  # keep draining so late pushes are counted, not scraped
+                await out.put(card)
+                self.released += 1
+        finally:
+            await out.put(None)
+
+    def summary(self):
+        return {**self.stats, "released": self.released}
@@ -0,0 +1,41 @@
+# FILE: x987/pipeline/prefilter.py
+# CONTRACT: judge search-result cards (year / price / mileage) before any detail page is fetched;
+# out-of-range years are dropped, ceilings drop or defer per [prefilter] mode
+from collections import Counter
+
+KEEP = "keep"
+DEFER = "defer"  # scraped after every kept card
+DROP = "drop"
+
+
+class Prefilter:
+    def __init__(self, cfg):
+        pf = cfg.get("prefilter") or {}
+        self.enabled = bool(pf.get("enabled", True))
+        self.card_only = bool(pf.get("card_only", False))
+        self.min_year = int(cfg.get("min_year", 0) or 0)
+        self.max_year = int(cfg.get("max_year", 0) or 0)
+        self.max_price = int(pf.get("max_price_usd", 0) or 0)  # 0 = no ceiling
+        self.max_mileage = int(pf.get("max_mileage", 0) or 0)
+        self.over_limit = DEFER if pf.get("mode", "drop") == "defer" else DROP
+        self.stats = Counter()
+
+    def verdict(self, card):
+        """(action, reason) for one card; fields the card lacks never count against it."""
+        if not self.enabled:
+            return KEEP, None
+        year, price, miles = card.get("year"), card.get("price_usd"), card.get("mileage")
+        if year and self.min_year and year < self.min_year:
+            return DROP, "year"
+        if year and self.max_year and year > self.max_year:
+            return DROP, "year"
+        if price and self.max_price and price > self.max_price:
+            return self.over_limit, "price"
+        if miles and self.max_mileage and miles > self.max_mileage:
+            return self.over_limit, "mileage"
+        return KEEP, None
+
+    def judge(self, card):
+        action, reason = self.verdict(card)
+        self.stats[action if reason is None else f"{action}:{reason}"] += 1
+        return action
@@ -0,0 +1,40 @@
+# FILE: x987/pipeline/reextract.py
+# CONTRACT: rebuild raw cars.com rows from the page archive with the current extraction code;
+# no browser, no network, fanned out over a process pool
+import os
+from concurrent.futures import ProcessPoolExecutor
+from ..scrapers.cars_com_extract import init_worker, worker_extract
+from ..utils import log
+from .archive import archived_pages, load_page
+from .state import ListingState
+
+
+def _extract_file(fp):
+    page = load_page(fp)
+    return worker_extract(
+        page["url"], page.get("body") or "", page.get("specs") or {}, fetch=f"archive:{page.get('run_id')}"
+    )
+
+
+def run_reextract(cfg, run_id=None):
+    log.step("reextract")
+    files = archived_pages(run_id)
+    if not files:
+        log.warn("No archived pages", run_id=run_id)
+        return []
+
+    debug = bool(cfg.get("debug", True))
+    workers = int((cfg.get("archive") or {}).get("workers", 0) or 0) or os.cpu_count() or 1
+    workers = max(1, min(workers, len(files)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(cfg, debug)) as pool:
+        rows = list(pool.map(_extract_file, files, chunksize=32))
+
+    # Keep the state store in step so cached rows pick up the new extraction too
+    if (cfg.get("state") or {}).get("enabled", True):
+        state = ListingState.load(cfg)
+        for row in rows:
+            state.replace_row(row)
+        state.save()
+
+    log.ok(count=len(rows), workers=workers)
+    return rows
@@ -1,10 +1,189 @@
-from ..scrapers.cars_com import scrape_cars_com
+import asyncio
+import time
+from ..collectors.autotempest import collect_autotempest_async
+from ..scrapers.cars_com import scrape_cars_com_async
+from ..scrapers.cars_com_extract import PAGE_REMOVED, PAGE_SOLD, card_row
 from ..utils import log
+from ..utils.ratelimit import RateLimiter
+from ..utils.text import canonical_url
+from .archive import PageArchive
+from .checkpoint import ScrapeCheckpoint
+from .frontier import Frontier
+from .prefilter import DEFER, DROP, Prefilter
+from .seen import incremental_seen, remember
+from .state import RELISTED, ListingState
 
+_GONE = (PAGE_SOLD, PAGE_REMOVED, RELISTED)  # quarantine reasons a listing never comes back from
 
-def run_scrape(collected, cfg):
-    log.step("scrape")
-    cars = [c["listing_url"] for c in collected if c.get("source") == "cars.com"]
-    rows = scrape_cars_com(cars, cfg) if cars else []
-    log.ok(count=len(rows))
-    return rows
+
+def _load_state(cfg):
+    if not (cfg.get("state") or {}).get("enabled", True):
+        return None
+    return ListingState.load(cfg)
+
+
+def _open_archive(cfg, run_id):
+    if not run_id or not (cfg.get("archive") or {}).get("enabled", True):
+        return None
+    return PageArchive.for_run(run_id)
+
+
+def _open_checkpoint(cfg, run_id):
+    if not run_id or not (cfg.get("checkpoint") or {}).get("enabled", True):
+        return None
+    ckpt = ScrapeCheckpoint.for_run(run_id, cfg)
+    if ckpt.rows:
+        log.info("Resuming scrape", run_id=run_id, done=len(ckpt.done_rows()))
+    return ckpt
+
+
+def _finish(rows, checkpoint):
+    """Prepend rows finished by earlier attempts of a resumed run."""
+    if checkpoint is None:
+        return rows
+    return checkpoint.done_rows() + rows
+
+
+def _interrupted(checkpoint, run_id):
+    if checkpoint is not None:
+        checkpoint.flush()
+        if checkpoint.path.exists():
+            log.warn("Scrape interrupted; resume with", cmd=f"python -m x987 --resume {run_id}")
+        else:
+            log.warn("Scrape interrupted before any row was checkpointed; nothing to resume")
+
+
+def _settled(collected, rows, dropped, state):
+    """
+    URLs the incremental seen-set may remember: listings that produced a row, that
+    the prefilter dropped on purpose, or that are gone for good (sold / removed /
+    relisted under a new URL).
+    Cards skipped at the cap or time budget, failed fetches and bot walls stay
+    unseen, so a later incremental run collects them again.
+    """
+    urls = [r["listing_url"] for r in rows if not r.get("error")] + dropped
+    if state is not None:
+        for c in collected:
+            rec = state.get(c["listing_url"])
+            if rec is not None and rec.get("quarantined") in _GONE:
+                urls.append(c["listing_url"])
+    return urls
+
+
+def _carry_over(known, rows, state, cfg, now=None):
+    """
+    Rows of listings an incremental run did not reach (paging stopped at known
+    ones), taken from the state store so the report still covers the whole
+    market. Gone listings and rows last scraped over [collect] carry_days ago
+    are left out; without the state store an incremental run's output is partial.
+    """
+    if known is None or state is None:
+        return []
+    days = float((cfg.get("collect") or {}).get("carry_days", 30) or 0)
+    now = time.time() if now is None else now
+    have = {canonical_url(r["listing_url"]) for r in rows if r.get("listing_url")}
+    carried = []
+    for url in known.urls:
+        rec = state.get(url)
+        if url in have or rec is None or not rec.get("row") or rec.get("quarantined") in _GONE:
+            continue
+        if days and now - float(rec.get("last_scraped") or 0) > days * 86400:
+            continue
+        carried.append(dict(rec["row"]))
+    return carried
+
+
+def run_collect_scrape(cfg, session, run_id=None):
+    """
+    Collect and scrape on the session's event loop: detail pages from the first
+    results page are being scraped while the collector loads the next search URL.
+    Returns (collected, scraped). Pages are archived under `run_id` when given,
+    and rows are checkpointed under it so an interrupted run can be resumed.
+
+    Cards are pre-filtered on their year/price/mileage before any detail fetch
+    (pipeline/prefilter.py), then released to the scraper by priority and
+    capped by cap_listings / a time budget (pipeline/frontier.py). In card-only
+    mode no detail page is fetched at all and the rows are built from the cards.
+    With `[collect] incremental`, stored rows of known listings past the point
+    where paging stopped are appended (see `_carry_over`).
+    """
+    log.step("collect + scrape")
+    urls = cfg.get("search_urls", [])
+    state = _load_state(cfg)
+    archive = _open_archive(cfg, run_id)
+    checkpoint = _open_checkpoint(cfg, run_id)
+    limiter = RateLimiter(cfg)  # shared by both stages; each host adapts on its own
+    prefilter = Prefilter(cfg)
+    frontier = Frontier(cfg, state)
+    known = incremental_seen(cfg)
+    carded = []
+    dropped = []
+    found = asyncio.Queue()
+    cars = asyncio.Queue(maxsize=1)  # backpressure: the frontier picks each next card late
+
+    async def _collect():
+        try:
+            return await collect_autotempest_async(
+                urls, cfg, session, sink=found, limiter=limiter, known=known
+            )
+        finally:
+            await found.put(None)
+
+    async def _route():
+        try:
+            while (item := await found.get()) is not None:
+                if item.get("source") != "cars.com":
+                    continue
+                action = prefilter.judge(item)
+                if action == DROP:
+                    dropped.append(item["listing_url"])
+                    continue
+                if prefilter.card_only:
+                    carded.append(item)
+                else:
+                    # over a ceiling with mode="defer": scraped after everything else
+                    frontier.push(item, demote=action == DEFER)
+        finally:
+            frontier.close()
+
+    async def _run():
+        jobs = [_collect(), _route()]
+        if not prefilter.card_only:
+            jobs.append(frontier.pump(cars))
+            jobs.append(
+                scrape_cars_com_async(
+                    cars,
+                    cfg,
+                    session,
+                    state=state,
+                    archive=archive,
+                    limiter=limiter,
+                    checkpoint=checkpoint,
+                )
+            )
+        collected, _, *scraped = await asyncio.gather(*jobs)
+        if prefilter.card_only:
+            debug = bool(cfg.get("debug", True))
+            unique = {c["listing_url"]: c for c in carded}
+            return collected, [card_row(c, debug) for c in unique.values()]
+        return collected, scraped[-1]
+
+    try:
+        collected, rows = session.run(_run())
+    except BaseException:
+        _interrupted(checkpoint, run_id)
+        raise
+    finally:
+        if state is not None:
+            state.save()
+    rows = _finish(rows, checkpoint)
+    remember(known, _settled(collected, rows, dropped, state))
+    carried = _carry_over(known, rows, state, cfg)
+    if carried:
+        log.info("Carried over from earlier runs", count=len(carried))
+        rows = rows + carried
+    log.info("Prefilter", **prefilter.stats)
+    log.info("Frontier", **frontier.summary())
+    log.info("Rate limits", **limiter.summary())
+    log.ok(collected=len(collected), scraped=len(rows))
+    return collected, rows
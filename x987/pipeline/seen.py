@@ -0,0 +1,61 @@
+# FILE: x987/pipeline/seen.py
+# CONTRACT: persistent set of listing URLs already settled by a run (scraped, dropped by the
+# prefilter, or gone) in META_DIR/seen_listings.json, canonical URL -> first-seen epoch;
+# drives incremental collection
+import json
+import os
+import pathlib
+import time
+from ..settings import get_paths
+from ..utils.text import canonical_url
+
+SEEN_FILE = "seen_listings.json"
+
+
+class SeenSet:
+    def __init__(self, path, data=None):
+        self.path = pathlib.Path(path)
+        self.urls = data or {}
+
+    @classmethod
+    def load(cls):
+        path = pathlib.Path(get_paths()["META_DIR"]) / SEEN_FILE
+        data = None
+        if path.exists():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except ValueError:
+                data = None
+        return cls(path, data)
+
+    def __contains__(self, url):
+        return canonical_url(url) in self.urls
+
+    def __len__(self):
+        return len(self.urls)
+
+    def add(self, url, now=None):
+        self.urls.setdefault(canonical_url(url), int(time.time() if now is None else now))
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.urls, f)
+        os.replace(tmp, self.path)
+
+
+def incremental_seen(cfg):
+    """The SeenSet when `[collect] incremental` is on, else None (full collection)."""
+    if not (cfg.get("collect") or {}).get("incremental", False):
+        return None
+    return SeenSet.load()
+
+
+def remember(seen, urls):
+    """Add settled listing URLs; cards that were only collected must not go in, or they are never collected again."""
+    if seen is None:
+        return
+    for url in urls:
+        seen.add(url)
+    seen.save()
@@ -0,0 +1,153 @@
+# FILE: x987/pipeline/state.py
+# CONTRACT: persistent per-listing scrape state (META_DIR/listing_state.json), keyed by canonical
+# listing_url with a VIN index; lets the scraper skip or cheaply revalidate listings it already has
+# and follows a car relisted under a new URL
+import hashlib
+import json
+import os
+import pathlib
+import time
+from ..settings import get_paths
+from ..utils.text import canonical_url
+from ..utils.vin import dedupe_key
+
+STATE_FILE = "listing_state.json"
+RELISTED = "relisted"  # quarantine reason: the same VIN turned up under a newer URL
+
+# Fields whose change means the listing changed; also what HTTP revalidation compares
+FINGERPRINT = ("price_usd", "mileage", "vin")
+
+
+def content_hash(row):
+    payload = json.dumps([row.get(k) for k in FINGERPRINT], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _public(row):
+    # debug/underscore columns are run-specific; never persist them
+    return {k: v for k, v in row.items() if not k.startswith("_")}
+
+
+class ListingState:
+    def __init__(self, path, data=None, ttl_s=24 * 3600, blocked_retry_s=3600):
+        self.path = pathlib.Path(path)
+        data = data or {}
+        self.listings = data.get("listings") or {}
+        self.vins = data.get("vins") or {}
+        self.ttl_s = ttl_s
+        self.blocked_retry_s = blocked_retry_s
+
+    @classmethod
+    def load(cls, cfg):
+        st = cfg.get("state") or {}
+        path = pathlib.Path(get_paths()["META_DIR"]) / STATE_FILE
+        data = None
+        if path.exists():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except ValueError:
+                data = None
+        return cls(
+            path,
+            data,
+            ttl_s=float(st.get("ttl_hours", 24)) * 3600,
+            blocked_retry_s=float(st.get("blocked_retry_hours", 1)) * 3600,
+        )
+
+    def get(self, url):
+        return self.listings.get(canonical_url(url))
+
+    def by_vin(self, vin):
+        url = self.vins.get((vin or "").upper())
+        return self.listings.get(url) if url else None
+
+    def is_fresh(self, rec, now=None):
+        if not rec or not rec.get("row"):
+            return False
+        now = time.time() if now is None else now
+        return now - float(rec.get("last_scraped") or 0) < self.ttl_s
+
+    def unchanged(self, rec, row):
+        """True when a revalidation fetch shows the same fingerprint as the stored row."""
+        return bool(rec and row and row.get("price_usd") is not None and content_hash(row) == rec.get("hash"))
+
+    def record(self, row, now=None):
+        """
+        Store a freshly scraped row (error rows are ignored). When its VIN (valid
+        check digit only) was last seen under another URL, the car was relisted:
+        the new record keeps the old one's first_seen and the old URL is parked
+        as "relisted" so it is not scraped again. Returns the old URL, else None.
+        """
+        if not row or row.get("error") or not row.get("listing_url"):
+            return None
+        key = canonical_url(row["listing_url"])
+        vin = (row.get("vin") or "").upper()
+        now = int(time.time() if now is None else now)
+        first_seen = (self.get(key) or {}).get("first_seen") or now
+        moved_from = None
+        old_key = self.vins.get(vin) if dedupe_key(vin) else None
+        if old_key and old_key != key and old_key in self.listings:
+            old = self.listings[old_key]
+            first_seen = min(first_seen, old.get("first_seen") or first_seen)
+            self.quarantine(old_key, RELISTED, now)
+            old["row"] = None
+            old["moved_to"] = key
+            moved_from = old_key
+        self.listings[key] = {
+            "listing_url": key,
+            "vin": vin or None,
+            "first_seen": first_seen,
+            "last_scraped": now,
+            "hash": content_hash(row),
+            "row": _public(row),
+        }
+        if moved_from:
+            self.listings[key]["relisted_from"] = moved_from
+        if vin:
+            self.vins[vin] = key
+        return moved_from
+
+    def replace_row(self, row):
+        """Swap in a re-extracted row for a known listing without resetting its freshness."""
+        rec = self.get(row.get("listing_url"))
+        if rec is None or row.get("error"):
+            return
+        rec["row"] = _public(row)
+        rec["hash"] = content_hash(row)
+        vin = (row.get("vin") or "").upper()
+        if vin:
+            rec["vin"] = vin
+            self.vins[vin] = rec["listing_url"]
+
+    def quarantine(self, url, reason, now=None):
+        """
+        Park a listing whose page was a bot wall ("blocked"), is gone ("sold",
+        "removed") or moved to a new URL ("relisted") so it is not fetched again;
+        a later successful `record` clears it.
+        """
+        key = canonical_url(url)
+        rec = self.listings.setdefault(key, {"listing_url": key, "vin": None, "row": None})
+        rec["quarantined"] = reason
+        rec["quarantined_at"] = int(time.time() if now is None else now)
+
+    def is_quarantined(self, rec, now=None):
+        reason = (rec or {}).get("quarantined")
+        if not reason:
+            return False
+        if reason != "blocked":
+            return True  # sold / removed listings do not come back
+        now = time.time() if now is None else now
+        return now - rec.get("quarantined_at", 0) < self.blocked_retry_s
+
+    def touch(self, url, now=None):
+        """Mark a revalidated-unchanged listing as fresh again."""
+        rec = self.get(url)
+        if rec:
+            rec["last_scraped"] = int(time.time() if now is None else now)
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"listings": self.listings, "vins": self.vins}, f)
+        os.replace(tmp, self.path)
@@ -80,6 +80,7 @@ def run_transform(raw_rows, cfg, run_id):
             year=year,
             model=(r.get("model") or None),
             trim=_norm_trim(r.get("trim")),
+            body_style=r.get("body_style") or None,
             transmission_raw=r.get("transmission_raw"),
             transmission_norm=_norm_trans(r.get("transmission_raw")),
             mileage=r.get("mileage"),
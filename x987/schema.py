@@ -11,6 +11,7 @@ class Listing:
     year: Optional[int] = None
     model: Optional[str] = None
     trim: Optional[str] = None
+    body_style: Optional[str] = None
     transmission_norm: Optional[str] = None
     transmission_raw: Optional[str] = None
     mileage: Optional[int] = None
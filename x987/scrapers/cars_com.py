@@ -1,312 +1,361 @@
 # FILE: x987/scrapers/cars_com.py
-from playwright.sync_api import sync_playwright
-import re
-
-BLOCK_URL_SUBSTR = [
-    "googletagmanager.com",
-    "google-analytics.com",
-    "doubleclick.net",
-    "facebook.net",
-    "adservice.google",
-    "adsystem",
-    "scorecardresearch",
-    "criteo",
-    "hotjar",
-    "optimizely",
-    "segment.io",
-    "newrelic",
-    "snowplow",
-]
-
-
-def _install_blocking(context, cfg):
-    nw = cfg.get("network", {}) or {}
-    block_types = set()
-    if nw.get("block_images", True):
-        block_types.add("image")
-    if nw.get("block_media", True):
-        block_types.add("media")
-    if nw.get("block_fonts", True):
-        block_types.add("font")
-    if nw.get("block_stylesheets", True):
-        block_types.add("stylesheet")
-    block_analytics = nw.get("block_analytics", True)
-
-    def _maybe_block(route):
-        req = route.request
-        if req.resource_type in block_types:
-            return route.abort()
-        if block_analytics and any(s in req.url for s in BLOCK_URL_SUBSTR):
-            return route.abort()
-        return route.continue_()
-
-    context.route("**/*", _maybe_block)
-
-
-def _text(page):
+import asyncio
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+from ..utils import log
+from ..utils.browser import MemoryWatch, ready_selector, wait_ready
+from ..utils.http import HttpClient
+from ..utils.ratelimit import THROTTLE_STATUS, RateLimiter
+from .cars_com_extract import (
+    PAGE_ANY_PATTERN,
+    PAGE_BLOCKED,
+    PAGE_OK,
+    Extractor,
+    classify_page,
+    init_worker,
+    worker_extract,
+)
+from .cars_com_http import fetch_detail_page, missing_required
+
+
+# One round trip per page: visible body text plus every <dt> label with the text of
+# its first following <dd> sibling (same pairing as //dt/following-sibling::dd[1]).
+EXTRACT_JS = r"""
+() => {
+  const specs = {};
+  for (const dt of document.querySelectorAll("dt")) {
+    const label = dt.textContent.replace(/\s+/g, " ").trim();
+    if (!label || label in specs) continue;
+    let dd = dt.nextElementSibling;
+    while (dd && dd.tagName !== "DD") dd = dd.nextElementSibling;
+    if (dd) specs[label] = dd.innerText.replace(/\s+/g, " ").trim();
+  }
+  return { body: document.body ? document.body.innerText : "", specs };
+}
+"""
+
+
+async def extract_page(page):
+    """Return (body_text, specs) for the loaded page in a single evaluate call."""
     try:
-        return page.locator("body").inner_text()
+        data = await page.evaluate(EXTRACT_JS)
     except Exception:
-        return ""
-
-
-def _find(pat, txt):
-    m = re.search(pat, txt, re.I | re.S)
-    return m.group(1).strip() if m else None
-
-
-def _clean_color(val):
-    if not val:
-        return None
-    s = str(val).strip()
-    if len(s) <= 2:
-        return None
-    return s
-
+        return "", {}
+    return data.get("body") or "", data.get("specs") or {}
 
-def _none_if_na(s: str | None):
-    if not s:
-        return None
-    t = re.sub(r"\s+", "", s).lower()
-    if t in {"-", "â€“", "â€”", "n/a", "na", "notspecified"}:
-        return None
-    return s.strip()
 
-
-def _dd_for(page, label: str) -> str | None:
-    # Read the first <dd> following a <dt> whose text matches `label`
+async def _fetch_http(run, url):
+    """(status, (body, specs) | None); status is None when the request itself failed."""
     try:
-        loc = page.locator(
-            f'xpath=//dt[normalize-space()="{label}"]/following-sibling::dd[1]'
-        ).first
-        if loc.count() > 0:
-            txt = loc.inner_text()
-            # collapse whitespace
-            return re.sub(r"\s+", " ", txt).strip()
+        async with run.limiter.slot(url) as t:
+            status, fetched = await asyncio.to_thread(fetch_detail_page, run.client, url)
+            # a 403 here usually means "not a browser", not "slow down": the page
+            # just goes to the browser path, which reports its own status
+            t.status = status if status != 403 else None
+        return status, fetched
     except Exception:
-        pass
-    return None
-
-
-# Color normalization
-_COLOR_CORE = r"(?:Black|White|Gray|Grey|Silver|Red|Blue|Green|Tan|Beige|Brown|Gold|Purple|Burgundy|Yellow|Orange|Ivory|Cream|Pearl|Metallic)"
-_COLOR_ADJ = r"(?:[A-Z][a-z]+|Arctic|Meteor|Classic|Carrera|Basalt|Carmine|Aqua|Racing|Guards|Seal|Sand|Sapphire|Slate|Midnight|Jet|Polar|Macadamia|Champagne)"
-_COLOR_PHRASE_RE = re.compile(
-    rf"^\s*((?:{_COLOR_ADJ}\s+)*{_COLOR_CORE}(?:\s+Metallic|\s+Pearl)?)\b"
-)
-
-
-def _norm_color_phrase(s: str | None):
-    if not s:
+        return None, None
+
+
+class _Tab:
+    """
+    One worker's browser page. It is swapped for a fresh page after
+    `recycle_after` navigations, when browser memory is over the limit, or after
+    its renderer crashed, so long runs do not grow Chromium without bound.
+    """
+
+    def __init__(self, context, recycle_after=0):
+        self.context = context
+        self.recycle_after = recycle_after
+        self.page = None
+        self.navs = 0
+        self.crashed = False
+
+    async def open(self):
+        self.page = await self.context.new_page()
+        self.navs = 0
+        self.crashed = False
+        self.page.on("crash", self._on_crash)
+
+    def _on_crash(self, _page):
+        self.crashed = True
+
+    def worn(self):
+        return bool(self.recycle_after) and self.navs >= self.recycle_after
+
+    async def close(self):
+        if self.page is None:
+            return
+        try:
+            await self.page.close()
+        except Exception:
+            pass  # a crashed page can already be gone
+        self.page = None
+
+    async def recycle(self):
+        await self.close()
+        await self.open()
+
+
+def _is_crash(tab, exc):
+    msg = str(exc).lower()
+    return tab.crashed or "crash" in msg or "target closed" in msg or "has been closed" in msg
+
+
+async def _fetch_browser(tab, url, run):
+    """(body, specs, page kind). Bot walls and dead listings end the wait as soon as their text shows."""
+    page = tab.page
+    tab.navs += 1
+    run.memory.tick()
+    # Extract as soon as the spec list / price is in the DOM rather than at "load";
+    # the wait scales with this host's observed latency and late loads are cancelled
+    timeout_s = run.limiter.ready_timeout_s(url)
+    async with run.limiter.slot(url) as t:
+        resp = await page.goto(url, wait_until="domcontentloaded")
+        t.status = resp.status if resp is not None else None
+    if not await wait_ready(page, ready_selector(url, run.cfg), timeout_s, fail_pattern=PAGE_ANY_PATTERN):
+        run.stats["not_ready"] += 1
+    body, specs = await extract_page(page)
+    kind = classify_page(body, specs, t.status)
+    if kind == PAGE_BLOCKED and t.status not in THROTTLE_STATUS:
+        run.limiter.blocked(url)  # a 200 bot wall; throttle statuses were already reported
+    return body, specs, kind
+
+
+async def _archive(run, url, body, specs, how):
+    if run.archive is not None:
+        await asyncio.to_thread(run.archive.save, url, body, specs, how)
+
+
+def _extract_pool(cfg, debug):
+    """Process pool so extraction overlaps the next navigation; None = inline ([extract] processes=false, 1 CPU)."""
+    ex = cfg.get("extract") or {}
+    if not ex.get("processes", True):
         return None
-    m = _COLOR_PHRASE_RE.search(s)
-    return m.group(1) if m else None
-
-
-# Centralized trim inference
-def _infer_trim(title: str | None, body: str) -> str | None:
-    t = title or ""
-
-    # Special trims (title only)
-    if re.search(r"\bCayman\s+R\b", t, re.I):
-        return "R"
-    if re.search(r"\bBoxster\s+Spyder\b", t, re.I):
-        return "Spyder"
-    if re.search(r"\bBlack\s+Edition\b", t, re.I):
-        return "Black Edition"
-
-    # Explicit S in title
-    if re.search(r"\b(Cayman|Boxster)\s+S\b", t, re.I):
-        return "S"
+    workers = int(ex.get("workers", 0) or 0) or min(4, (os.cpu_count() or 1) - 1)
+    if workers < 1:
+        return None
+    return ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(cfg, debug))
 
-    # Explicit Base hints
-    if re.search(r"\bCayman\s+Base\b", t, re.I):
-        return "Base"
-    if re.search(r"\bBASE\s+Cayman\b", body, re.I):
-        return "Base"
 
-    # Default to Base when title is neutral
-    trim = "Base"
+def _extract(run, url, body, specs):
+    """Future for the extracted row; the regex work runs in the pool when there is one."""
+    loop = asyncio.get_running_loop()
+    if run.pool is None:
+        fut = loop.create_future()
+        fut.set_result(run.extractor.extract(url, body, specs))
+        return fut
+    return loop.run_in_executor(run.pool, worker_extract, url, body, specs)
 
-    # Engine displacement override (only if unambiguous)
-    has29 = re.search(r"\b2[\.,]9\s*l\b|\b2\.9l\b", body, re.I)
-    has34 = re.search(r"\b3[\.,]4\s*l\b|\b3\.4l\b", body, re.I)
-    if has34 and not has29:
-        trim = "S"
-    elif has29 and not has34:
-        trim = "Base"
 
-    return trim
+async def _scrape_browser(tab, url, run):
+    body, specs, kind = await _fetch_browser(tab, url, run)
+    if kind != PAGE_OK:
+        return None, kind
+    await _archive(run, url, body, specs, "browser")
+    return _extract(run, url, body, specs), "browser"
 
 
-def scrape_cars_com(urls, cfg):
-    rows = []
-    polite = int(cfg.get("polite_delay_ms", 900))
+async def _scrape_browser_retrying(tab, url, run):
+    """_scrape_browser; after a renderer crash the page is replaced and only the render is tried once more."""
+    try:
+        return await _scrape_browser(tab, url, run)
+    except Exception as e:
+        if not _is_crash(tab, e):
+            raise
+    run.stats["crashed"] += 1
+    await tab.recycle()
+    return await _scrape_browser(tab, url, run)
+
+
+async def _scrape_one(tab, url, rec, run):
+    """
+    Return (row, how) where how is "revalidated", "http" or "browser", or
+    (None, kind) for a "blocked", "sold" or "removed" page. For "browser" the
+    row is a future still being extracted, so the page can navigate on.
+    """
+    if run.client is not None:
+        # HTTP-first: only pages whose HTML lacks a required field need a browser render
+        status, fetched = await _fetch_http(run, url)
+        body, specs = fetched or ("", None)
+        kind = classify_page(body, specs, status)
+        if kind not in (PAGE_OK, PAGE_BLOCKED):
+            return None, kind  # sold/removed: no browser render can change that
+        if fetched is not None and kind == PAGE_OK:
+            # the HTTP verdict needs the row now; the wait is off the browser's thread all the same
+            row = await _extract(run, url, *fetched)
+            if rec is not None and run.state.unchanged(rec, row):
+                run.state.touch(url)
+                return _stored_row(rec, url), "revalidated"
+            if not missing_required(row, run.cfg):
+                await _archive(run, url, *fetched, "http")
+                return row, "http"
+        # blocked over plain HTTP: the browser may still get through
+    return await _scrape_browser_retrying(tab, url, run)
+
+
+def _known_by_price(rec, card):
+    if not rec or not card or card.get("price_usd") is None:
+        return False
+    return (rec.get("row") or {}).get("price_usd") == card["price_usd"]
+
+
+def _stored_row(rec, url):
+    row = dict(rec["row"])
+    row["listing_url"] = url
+    return row
+
+
+async def _scrape_guarded(tab, url, rec, run):
+    """_scrape_one, with any failure turned into an error row."""
+    try:
+        return await _scrape_one(tab, url, rec, run)
+    except Exception as e:
+        return {"source": "cars.com", "listing_url": url, "error": str(e)}, "error"
+
+
+def _store(i, url, row, how, rows, run):
+    run.stats[how] += 1
+    if row is None:
+        # blocked / sold / removed: parked in the state store, no row for ingest
+        if run.state is not None:
+            run.state.quarantine(url, how)
+        return
+    if run.state is not None and how != "revalidated" and run.state.record(row):
+        run.stats["relisted"] += 1  # same VIN as a listing stored under an older URL
+    if run.debug:
+        row["_fetch"] = how
+    rows[i] = row
+    if run.checkpoint is not None:
+        run.checkpoint.add(row)
+
+
+async def _finish(i, url, pending, how, rows, run):
+    try:
+        row = await pending
+    except Exception as e:
+        row, how = {"source": "cars.com", "listing_url": url, "error": str(e)}, "error"
+    _store(i, url, row, how, rows, run)
+
+
+async def _worker(tab, work, rows, run):
+    await tab.open()
+    while True:
+        job = await work.get()
+        if job is None:
+            break
+        i, url, rec = job
+        if tab.worn() or run.memory.claim_recycle():
+            await tab.recycle()
+            run.stats["recycled"] += 1
+        row, how = await _scrape_guarded(tab, url, rec, run)
+        if asyncio.isfuture(row):
+            # extraction finishes in the pool while this page loads the next URL
+            task = asyncio.ensure_future(_finish(i, url, row, how, rows, run))
+            run.pending.add(task)
+            task.add_done_callback(run.pending.discard)
+            continue
+        _store(i, url, row, how, rows, run)
+
+
+async def scrape_cars_com_async(source, cfg, context, state=None, archive=None, limiter=None, checkpoint=None):
+    """
+    Scrape listing URLs (or collector cards) read from `source`, an asyncio.Queue
+    terminated by None, with a pool of pages from `context` (the BrowserSession).
+    Duplicate URLs are scraped once.
+
+    Returns the good rows in arrival order. Listings in `state` that are fresh or
+    unchanged are served from it, URLs already in `checkpoint` are skipped (the
+    caller merges `checkpoint.done_rows()` back in) and fetched pages go to
+    `archive`. Bot-wall, sold and removed pages are quarantined in `state`; they
+    and failed fetches are left out.
+    """
+    limiter = limiter or RateLimiter(cfg)  # shared with the collector
+    n = limiter.max_concurrency  # pages open; the limiter decides how many load at once
+    use_http = bool((cfg.get("http") or {}).get("enabled", True))
     debug = bool(cfg.get("debug", True))
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        context = browser.new_context(ignore_https_errors=True)
-        context.set_default_timeout(10_000)
-        _install_blocking(context, cfg)
-        page = context.new_page()
-
-        for url in urls:
-            try:
-                page.goto(url, wait_until="domcontentloaded")
-                page.wait_for_timeout(polite)
-                body = _text(page)
-
-                price = _find(r"\$(\d[\d,]+)", body)
-                miles = _find(r"(\d[\d,]+)\s*(?:miles|mi)\b", body) or _find(
-                    r"mileage\s*:?\s*(\d[\d,]+)", body
-                )
-                title = _find(r"(20\d\d\s+Porsche\s+\w+[^\n]+)", body) or _find(
-                    r"(20\d\d\s+Porsche\s+\w+)", body
-                )
-
-                # Year/model from title
-                year = model = None
-                if title:
-                    m = re.search(r"(20\d\d)\s+Porsche\s+(Cayman|Boxster)", title, re.I)
-                    if m:
-                        year = int(m.group(1))
-                        model = m.group(2).title()
-
-                # Trim via consolidated logic
-                trim = _infer_trim(title, body)
-
-                # Transmission (raw)
-                trans = _find(r"Transmission\s*:?\s*([A-Za-z0-9\- /]+)", body) or _find(
-                    r"([AP]utomatic|PDK|Tiptronic|Manual)", body
-                )
-
-                # Colors â€“ DOM first
-                ext_dom = _none_if_na(_dd_for(page, "Exterior color"))
-                int_dom = _none_if_na(_dd_for(page, "Interior color"))
-
-                extc = _norm_color_phrase(_clean_color(ext_dom))
-                intc = _norm_color_phrase(_clean_color(int_dom))
-
-                # Fallbacks if DOM didnâ€™t yield values (keep our previous heuristics)
-                if not extc or not intc:
-                    lab_ext = _find(r"Exterior\s*color\s*:?\s*([A-Za-z \-]+)", body)
-                    lab_int = _find(r"Interior\s*color\s*:?\s*([A-Za-z \-]+)", body)
-                    if not extc:
-                        extc = _norm_color_phrase(_clean_color(lab_ext))
-                    if not intc:
-                        intc = _norm_color_phrase(_clean_color(lab_int))
-
-                if not extc or not intc:
-                    m = re.search(
-                        rf"(({_COLOR_ADJ}\s+)*{_COLOR_CORE}(?:\s+Metallic|\s+Pearl)?)\s+Exterior\s+(({_COLOR_ADJ}\s+)*{_COLOR_CORE}(?:\s+Metallic|\s+Pearl)?)\s+Interior",
-                        body,
-                        re.I,
-                    )
-                    if m:
-                        extc = extc or _norm_color_phrase(m.group(1))
-                        intc = intc or _norm_color_phrase(m.group(3))
-
-                if not extc or not intc:
-                    m = re.search(
-                        rf"(({_COLOR_ADJ}\s+)*{_COLOR_CORE}(?:\s+Metallic|\s+Pearl)?)\s+(?:on|over)\s+(({_COLOR_ADJ}\s+)*{_COLOR_CORE}(?:\s+Metallic|\s+Pearl)?)",
-                        body,
-                        re.I,
-                    )
-                    if m:
-                        extc = extc or _norm_color_phrase(m.group(1))
-                        intc = intc or _norm_color_phrase(m.group(3))
-
-                if not extc or not intc:
-                    m = re.search(
-                        rf"(({_COLOR_ADJ}\s+)*{_COLOR_CORE}(?:\s+Metallic|\s+Pearl)?)\s+Exterior\s+(({_COLOR_ADJ}\s+)*{_COLOR_CORE}(?:\s+Metallic|\s+Pearl)?)\s+Interior",
-                        body,
-                        re.I,
-                    )
-                    if m:
-                        extc = extc or _norm_color_phrase(m.group(1))
-                        intc = intc or _norm_color_phrase(m.group(3))
-                if not extc or not intc:
-                    m = re.search(
-                        rf"(({_COLOR_ADJ}\s+)*{_COLOR_CORE}(?:\s+Metallic|\s+Pearl)?)\s+(?:on|over)\s+(({_COLOR_ADJ}\s+)*{_COLOR_CORE}(?:\s+Metallic|\s+Pearl)?)",
-                        body,
-                        re.I,
-                    )
-                    if m:
-                        extc = extc or _norm_color_phrase(m.group(1))
-                        intc = intc or _norm_color_phrase(m.group(3))
-
-                # VIN & location
-                vin = _find(r"VIN\s*:?\s*([A-HJ-NPR-Z0-9]{11,17})", body)
-                loc = _find(r"(?:Dealer location|Location)\s*:?\s*([A-Za-z ,]+)", body) or _find(
-                    r"([A-Za-z .]+,\s*[A-Z]{2})", body
-                )
-
-                # Options: capture any lines that match configured option patterns
-                # so transform/options.py can canonicalize later.
-                opt_lines = set()
-                try:
-                    # inside cars_com.py where you compile option patterns:
-                    op2 = (cfg.get("options_v2") or {}).get("catalog", [])  # v2
-                    pats = []
-                    for item in op2:
-                        for pat in item.get("synonyms") or []:
-                            try:
-                                pats.append(re.compile(pat, re.I))
-                            except re.error:
-                                pass
-                    # Fallback simple keywords so we don't regress if catalog is empty
-                    if not pats:
-                        for kw in [
-                            "sport chrono",
-                            "pasm",
-                            "sport exhaust",
-                            "pse",
-                            "limited slip",
-                            "lsd",
-                            "sport seats",
-                            "adaptive sport seats",
-                        ]:
-                            pats.append(re.compile(re.escape(kw), re.I))
-
-                    for line in body.splitlines():
-                        s = line.strip()
-                        if not s:
-                            continue
-                        if any(p.search(s) for p in pats):
-                            opt_lines.add(s)
-                except Exception:
-                    pass
-
-                row = {
-                    "source": "cars.com",
-                    "listing_url": url,
-                    "price_usd": int(price.replace(",", "")) if price else None,
-                    "mileage": int(miles.replace(",", "")) if miles else None,
-                    "year": year,
-                    "model": model,
-                    "trim": trim,
-                    "transmission_raw": trans,
-                    "exterior_color": extc,
-                    "interior_color": intc,
-                    "vin": vin,
-                    "location": loc,
-                    "description_raw": None,
-                    "raw_options": sorted(opt_lines),
-                    "photos_count": None,
-                    "seller_type": None,
-                }
-
-                # Optional: write trim debug into RAW CSV when debug=true
-                if debug:
-                    row["_trim_title"] = title or ""
-                    row["_has_29L"] = bool(re.search(r"\b2[\.,]9\s*l\b|\b2\.9l\b", body, re.I))
-                    row["_has_34L"] = bool(re.search(r"\b3[\.,]4\s*l\b|\b3\.4l\b", body, re.I))
-
+    br = cfg.get("browser") or {}
+    run = SimpleNamespace(
+        cfg=cfg,
+        limiter=limiter,
+        debug=debug,
+        extractor=Extractor(cfg, debug),
+        client=HttpClient(pool_size=n) if use_http else None,
+        state=state,
+        archive=archive,
+        checkpoint=checkpoint,
+        recycle_after=int(br.get("recycle_after", 50) or 0),
+        memory=MemoryWatch(int(br.get("max_rss_mb", 0) or 0)),
+        pool=_extract_pool(cfg, debug),
+        pending=set(),
+        stats=Counter(),
+    )
+
+    # Rows are written into their arrival slot so output order is independent
+    # of which page finished first.
+    rows = []
+    # Bounded, so the feeder only pulls the next item from `source` when a page is
+    # about to free up; a priority-ordered source then decides what is scraped next.
+    work = asyncio.Queue(maxsize=n)
+
+    async def _feed():
+        seen = set()
+        while True:
+            item = await source.get()
+            if item is None:
+                break
+            # Items are URLs or collector cards ({"listing_url", "price_usd", ...})
+            card = item if isinstance(item, dict) else None
+            url = card["listing_url"] if card else item
+            if url in seen:
+                continue
+            seen.add(url)
+            if checkpoint is not None and checkpoint.is_done(url):
+                run.stats["resumed"] += 1
+                continue
+            rec = state.get(url) if state is not None else None
+            if rec is not None and state.is_quarantined(rec):
+                run.stats["quarantined"] += 1
+                continue
+            # scraped within the TTL, or the card's price matches the stored row: no fetch at all
+            # (stale listings are revalidated with one HTTP GET in _scrape_one)
+            known = _known_by_price(rec, card)
+            if rec is not None and (known or state.is_fresh(rec)):
+                how = "known" if known else "cached"
+                if known:
+                    state.touch(url)
+                row = _stored_row(rec, url)
+                if run.debug:
+                    row["_fetch"] = how
+                run.stats[how] += 1
                 rows.append(row)
-
-            except Exception as e:
-                rows.append({"source": "cars.com", "listing_url": url, "error": str(e)})
-
-        browser.close()
-    return rows
+                if checkpoint is not None:
+                    checkpoint.add(row)
+                continue
+            rows.append(None)
+            await work.put((len(rows) - 1, url, rec))
+        for _ in range(n):
+            await work.put(None)
+
+    tabs = [_Tab(context, run.recycle_after) for _ in range(n)]
+    try:
+        await asyncio.gather(_feed(), *(_worker(tab, work, rows, run) for tab in tabs))
+        await asyncio.gather(*run.pending)
+    finally:
+        for tab in tabs:
+            await tab.close()
+        if run.pool is not None:
+            run.pool.shutdown(cancel_futures=True)
+        if run.client is not None:
+            run.client.close()
+        if checkpoint is not None:
+            checkpoint.flush()
+    log.info("cars.com fetch", **run.stats)
+    if run.memory.peak is not None:
+        log.info("Browser memory", **run.memory.summary())
+    elif run.memory.navs:
+        log.info("Browser memory not measured (psutil missing: pip install -r requirements.txt)")
+    # empty slots are quarantined pages; error rows stay in the checkpoint for a retry on --resume
+    return [r for r in rows if r is not None and not r.get("error")]
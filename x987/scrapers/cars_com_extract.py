@@ -0,0 +1,508 @@
+# FILE: x987/scrapers/cars_com_extract.py
+# CONTRACT: turn a cars.com detail page (visible body text + <dt>/<dd> spec map) into a raw row;
+# shared by the Playwright and HTTP fetch paths so both produce identical rows
+import re
+from types import SimpleNamespace
+from ..utils.vin import decode as decode_vin
+from .rules import compile_rules, load_rules
+
+
+def _find(rx, txt):
+    m = rx.search(txt)
+    return m.group(1).strip() if m else None
+
+
+def _clean_color(val):
+    if not val:
+        return None
+    s = str(val).strip()
+    if len(s) <= 2:
+        return None
+    return s
+
+
+def _none_if_na(s: str | None):
+    if not s:
+        return None
+    t = _WS_RE.sub("", s).lower()
+    if t in {"-", "â€“", "â€”", "n/a", "na", "notspecified"}:
+        return None
+    return s.strip()
+
+
+_NUM_RE = re.compile(r"\d[\d,]*")
+_WS_RE = re.compile(r"\s+")
+
+
+def _spec(specs, labels):
+    # First non-empty value among a field's spec labels
+    for label in labels:
+        v = specs.get(label)
+        if v:
+            return v
+    return None
+
+
+def _spec_num(specs, labels):
+    # "45,123 mi." / "31500.0" -> "45,123" / "31500"
+    m = _NUM_RE.search(str(_spec(specs, labels) or ""))
+    return m.group(0) if m else None
+
+
+# Color normalization
+_COLOR_CORE = r"(?:Black|White|Gray|Grey|Silver|Red|Blue|Green|Tan|Beige|Brown|Gold|Purple|Burgundy|Yellow|Orange|Ivory|Cream|Pearl|Metallic)"
+_COLOR_ADJ = r"(?:[A-Z][a-z]+|Arctic|Meteor|Classic|Carrera|Basalt|Carmine|Aqua|Racing|Guards|Seal|Sand|Sapphire|Slate|Midnight|Jet|Polar|Macadamia|Champagne)"
+_COLOR_PHRASE_RE = re.compile(
+    rf"^\s*((?:{_COLOR_ADJ}\s+)*{_COLOR_CORE}(?:\s+Metallic|\s+Pearl)?)\b"
+)
+
+
+def _norm_color_phrase(s: str | None):
+    if not s:
+        return None
+    m = _COLOR_PHRASE_RE.search(s)
+    return m.group(1) if m else None
+
+
+_COLOR_FULL = rf"(({_COLOR_ADJ}\s+)*{_COLOR_CORE}(?:\s+Metallic|\s+Pearl)?)"
+
+# Body-text patterns, compiled once at import (the old _find compiled with re.I | re.S)
+_IS = re.I | re.S
+_PRICE_RE = re.compile(r"\$(\d[\d,]+)", _IS)
+_MILES_RE = re.compile(r"(\d[\d,]+)\s*(?:miles|mi)\b", _IS)
+_MILEAGE_LABEL_RE = re.compile(r"mileage\s*:?\s*(\d[\d,]+)", _IS)
+_TITLE_LONG_RE = re.compile(r"(20\d\d\s+Porsche\s+\w+[^\n]+)", _IS)
+_TITLE_SHORT_RE = re.compile(r"(20\d\d\s+Porsche\s+\w+)", _IS)
+_YEAR_MODEL_RE = re.compile(r"(20\d\d)\s+Porsche\s+(Cayman|Boxster)", re.I)
+_TRANS_LABEL_RE = re.compile(r"Transmission\s*:?\s*([A-Za-z0-9\- /]+)", _IS)
+_TRANS_WORD_RE = re.compile(r"([AP]utomatic|PDK|Tiptronic|Manual)", _IS)
+_EXT_LABEL_RE = re.compile(r"Exterior\s*color\s*:?\s*([A-Za-z \-]+)", _IS)
+_INT_LABEL_RE = re.compile(r"Interior\s*color\s*:?\s*([A-Za-z \-]+)", _IS)
+_EXT_INT_RE = re.compile(rf"{_COLOR_FULL}\s+Exterior\s+{_COLOR_FULL}\s+Interior", re.I)
+_ON_OVER_RE = re.compile(rf"{_COLOR_FULL}\s+(?:on|over)\s+{_COLOR_FULL}", re.I)
+_VIN_RE = re.compile(r"VIN\s*:?\s*([A-HJ-NPR-Z0-9]{11,17})", _IS)
+_LOC_LABEL_RE = re.compile(r"(?:Dealer location|Location)\s*:?\s*([A-Za-z ,]+)", _IS)
+_LOC_CITY_RE = re.compile(r"([A-Za-z .]+,\s*[A-Z]{2})", _IS)
+
+# Body segmentation: page text is split once at its section headings so each field is
+# looked for where it lives (price/mileage under the title, VIN/transmission in the spec
+# list, location in the dealer block) and never in "similar vehicles" carousels or ads.
+_SECTION_HEADINGS = {
+    "specs": ("basics", "specifications", "specs", "vehicle details", "details"),
+    "features": ("features", "key features", "all features", "features & specs", "packages", "options"),
+    "dealer": ("seller info", "seller's info", "dealer info", "about the seller", "about this dealer"),
+    "history": ("vehicle history", "history"),
+    "junk": (
+        "similar vehicles",
+        "similar cars",
+        "similar listings",
+        "you may also like",
+        "sponsored",
+        "recommended for you",
+        "shoppers also viewed",
+        "more from this seller",
+        "more from this dealer",
+        "related searches",
+        "popular searches",
+    ),
+}
+_HEADING_MAX_LEN = 40
+
+
+def segment_body(body, rules=None):
+    """
+    Split page text into sections: `head` (title line up to the first heading:
+    title, price, mileage), `specs`, `features`, `dealer`, plus `main` (all of
+    the listing's own text: no site chrome above the title, no carousels/ads).
+    Without a recognisable title line every section is the whole body.
+    """
+    rules = rules or BUILTIN_RULES
+    parts = {"nav": [], "head": [], "specs": [], "features": [], "dealer": [], "history": [], "junk": []}
+    current = "nav"  # site chrome until the listing title
+    for line in body.splitlines():
+        s = line.strip()
+        kind = rules.headings.get(s.lower().rstrip(":")) if len(s) <= _HEADING_MAX_LEN else None
+        if kind is not None and current != "nav":
+            current = kind
+        elif current == "nav" and rules.title_short.search(s):
+            current = "head"
+        parts[current].append(line)
+    if not parts["head"]:
+        return SimpleNamespace(head=body, specs=body, features=body, dealer=body, main=body)
+    own = ("head", "specs", "features", "dealer", "history")
+    return SimpleNamespace(
+        head="\n".join(parts["head"]),
+        specs="\n".join(parts["specs"]),
+        features="\n".join(parts["features"]),
+        dealer="\n".join(parts["dealer"]),
+        main="\n".join(line for k in own for line in parts[k]),
+    )
+
+
+def _find_in(rx, *texts):
+    """First match of `rx` scanning `texts` in order (most specific section first)."""
+    for txt in texts:
+        if txt:
+            m = rx.search(txt)
+            if m:
+                return m.group(1).strip()
+    return None
+
+
+# Page classification: bot walls and dead listings are recognised from the first few KB of
+# text before any row extraction. The sources are plain alternations so the browser can run
+# the same patterns (utils/browser.wait_ready) and stop waiting as soon as one shows up.
+PAGE_OK, PAGE_BLOCKED, PAGE_SOLD, PAGE_REMOVED = "ok", "blocked", "sold", "removed"
+PAGE_PATTERNS = {
+    PAGE_BLOCKED: (
+        r"access denied|pardon our interruption|verify (?:that )?you are (?:a )?human|are you a robot"
+        r"|unusual traffic|request (?:was )?blocked|complete the security check|captcha"
+    ),
+    PAGE_SOLD: r"this (?:vehicle|car) (?:has been|is|was) sold|vehicle sold",
+    PAGE_REMOVED: (
+        r"(?:vehicle|listing|car) (?:is )?no longer available|listing (?:has been )?removed"
+        r"|page (?:was )?not found|we can.t find (?:that|this) page"
+    ),
+}
+_PAGE_RES = [(kind, re.compile(src, re.I)) for kind, src in PAGE_PATTERNS.items()]
+PAGE_ANY_PATTERN = "|".join(f"(?:{src})" for src in PAGE_PATTERNS.values())
+_CLASSIFY_HEAD = 3000
+_GONE_STATUS = {404, 410}
+
+
+def classify_page(body, specs=None, status=None):
+    """
+    "ok", "blocked", "sold" or "removed" for a fetched detail page. A page with a
+    spec list is a real listing whatever its footer says; otherwise only the head
+    of the text is scanned, so this stays well under a millisecond.
+    """
+    if status in _GONE_STATUS:
+        return PAGE_REMOVED
+    if specs:
+        return PAGE_OK
+    head = (body or "")[:_CLASSIFY_HEAD]
+    for kind, rx in _PAGE_RES:
+        if rx.search(head):
+            return kind
+    return PAGE_OK
+
+
+# Trim inference
+_T_CAYMAN_R = re.compile(r"\bCayman\s+R\b", re.I)
+_T_SPYDER = re.compile(r"\bBoxster\s+Spyder\b", re.I)
+_T_BLACK_ED = re.compile(r"\bBlack\s+Edition\b", re.I)
+_T_S = re.compile(r"\b(Cayman|Boxster)\s+S\b", re.I)
+_T_CAYMAN_BASE = re.compile(r"\bCayman\s+Base\b", re.I)
+_T_BASE_CAYMAN = re.compile(r"\bBASE\s+Cayman\b", re.I)
+_HAS_29L = re.compile(r"\b2[\.,]9\s*l\b|\b2\.9l\b", re.I)
+_HAS_34L = re.compile(r"\b3[\.,]4\s*l\b|\b3\.4l\b", re.I)
+
+# Built-in cars.com rules; USER_RULES/cars_com.toml can add labels/headings and replace
+# regexes (scrapers/rules.py). Field names here are the keys that file uses.
+DEFAULT_RULES = {
+    "labels": {
+        "price": ("Price",),
+        "mileage": ("Mileage",),
+        "title": ("Title",),
+        "transmission": ("Transmission",),
+        "vin": ("VIN",),
+        "exterior_color": ("Exterior color",),
+        "interior_color": ("Interior color",),
+    },
+    "regex": {
+        "price": _PRICE_RE,
+        "mileage": _MILES_RE,
+        "mileage_label": _MILEAGE_LABEL_RE,
+        "title_long": _TITLE_LONG_RE,
+        "title_short": _TITLE_SHORT_RE,
+        "year_model": _YEAR_MODEL_RE,
+        "transmission_label": _TRANS_LABEL_RE,
+        "transmission_word": _TRANS_WORD_RE,
+        "exterior_label": _EXT_LABEL_RE,
+        "interior_label": _INT_LABEL_RE,
+        "ext_int": _EXT_INT_RE,
+        "on_over": _ON_OVER_RE,
+        "vin": _VIN_RE,
+        "location_label": _LOC_LABEL_RE,
+        "location_city": _LOC_CITY_RE,
+        "has_29l": _HAS_29L,
+        "has_34l": _HAS_34L,
+    },
+    "sections": _SECTION_HEADINGS,
+}
+BUILTIN_RULES = compile_rules(DEFAULT_RULES)
+
+# Fallback simple keywords so we don't regress if the options catalog is empty
+_OPTION_KEYWORDS = [
+    "sport chrono",
+    "pasm",
+    "sport exhaust",
+    "pse",
+    "limited slip",
+    "lsd",
+    "sport seats",
+    "adaptive sport seats",
+]
+
+
+# Centralized trim inference
+def _special_trim(title: str | None) -> str | None:
+    # Special trims (title only; the VIN does not encode them)
+    t = title or ""
+    if _T_CAYMAN_R.search(t):
+        return "R"
+    if _T_SPYDER.search(t):
+        return "Spyder"
+    if _T_BLACK_ED.search(t):
+        return "Black Edition"
+    return None
+
+
+def _infer_trim(title: str | None, body: str, has29=None, has34=None) -> str | None:
+    t = title or ""
+
+    special = _special_trim(t)
+    if special:
+        return special
+
+    # Explicit S in title
+    if _T_S.search(t):
+        return "S"
+
+    # Explicit Base hints
+    if _T_CAYMAN_BASE.search(t):
+        return "Base"
+    if _T_BASE_CAYMAN.search(body):
+        return "Base"
+
+    # Default to Base when title is neutral
+    trim = "Base"
+
+    # Engine displacement override (only if unambiguous)
+    if has29 is None:
+        has29 = bool(_HAS_29L.search(body))
+    if has34 is None:
+        has34 = bool(_HAS_34L.search(body))
+    if has34 and not has29:
+        trim = "S"
+    elif has29 and not has34:
+        trim = "Base"
+
+    return trim
+
+
+def _compile_option_matcher(cfg):
+    """One regex alternation over every catalog synonym (malformed synonyms are skipped)."""
+    pats = []
+    for item in (cfg.get("options_v2") or {}).get("catalog", []) or []:
+        for pat in item.get("synonyms") or []:
+            try:
+                re.compile(pat, re.I)
+            except re.error:
+                continue
+            pats.append(pat)
+    if not pats:
+        pats = [re.escape(kw) for kw in _OPTION_KEYWORDS]
+    try:
+        return re.compile("|".join(f"(?:{p})" for p in pats), re.I)
+    except re.error:
+        # e.g. a synonym with inline global flags can't be embedded; match one by one
+        compiled = [re.compile(p, re.I) for p in pats]
+        return SimpleNamespace(search=lambda s: any(p.search(s) for p in compiled))
+
+
+class Extractor:
+    """
+    cars.com row extractor built once per run from config: spec labels, body
+    regexes and section headings come precompiled from the site rules (built-ins
+    plus USER_RULES/cars_com.toml, cached by file hash) and the options catalog is
+    folded into a single matcher, so per-page cost is just the scans themselves.
+    """
+
+    def __init__(self, cfg, debug=False):
+        self.cfg = cfg
+        self.debug = debug
+        self.options = _compile_option_matcher(cfg)
+        self.segment = bool((cfg.get("extract") or {}).get("segment", True))
+        self.rules = load_rules("cars.com", cfg, DEFAULT_RULES)
+
+    def _colors(self, specs, body):
+        # Spec list (DOM <dt>/<dd>) first
+        r = self.rules
+        extc = _norm_color_phrase(_clean_color(_none_if_na(_spec(specs, r.labels["exterior_color"]))))
+        intc = _norm_color_phrase(_clean_color(_none_if_na(_spec(specs, r.labels["interior_color"]))))
+
+        # Fallbacks if the spec list didn't yield values (keep our previous heuristics)
+        if not extc or not intc:
+            if not extc:
+                extc = _norm_color_phrase(_clean_color(_find(r.exterior_label, body)))
+            if not intc:
+                intc = _norm_color_phrase(_clean_color(_find(r.interior_label, body)))
+
+        for rx in (r.ext_int, r.on_over):
+            if extc and intc:
+                break
+            m = rx.search(body)
+            if m:
+                extc = extc or _norm_color_phrase(m.group(1))
+                intc = intc or _norm_color_phrase(m.group(3))
+        return extc, intc
+
+    def _option_lines(self, body):
+        # Capture any lines that match configured option patterns so
+        # transform/options.py can canonicalize later.
+        opt_lines = set()
+        for line in body.splitlines():
+            s = line.strip()
+            if s and self.options.search(s):
+                opt_lines.add(s)
+        return opt_lines
+
+    def extract(self, url, body, specs):
+        """
+        Build the raw cars.com row from page text. `specs` maps spec labels
+        ("Exterior color", "VIN", "Mileage", ...) to values and wins over body-text
+        regexes when present; the HTTP path also fills "Title" and "Price".
+
+        Body text is segmented once (segment_body) and each field scans its own
+        section first, then the listing's text; only price, mileage and title
+        fall back to the whole page. `[extract] segment=false` scans the whole body
+        for everything, as before.
+        """
+        specs = specs or {}
+        r = self.rules
+        if self.segment:
+            sec = segment_body(body, r)
+        else:
+            sec = SimpleNamespace(head=body, specs=body, features=body, dealer=body, main=body)
+        main = sec.main
+
+        price = _spec_num(specs, r.labels["price"]) or _find_in(r.price, sec.head, main, body)
+        miles = (
+            _spec_num(specs, r.labels["mileage"])
+            or _find_in(r.mileage, sec.head, main, body)
+            or _find_in(r.mileage_label, sec.specs, main)
+        )
+        title = (
+            _spec(specs, r.labels["title"])
+            or _find_in(r.title_long, sec.head, body)
+            or _find_in(r.title_short, sec.head, body)
+        )
+
+        # VIN first: when it decodes, year/model/body style/trim come from its tables
+        vin = _none_if_na(_spec(specs, r.labels["vin"])) or _find_in(r.vin, sec.specs, main)
+        decoded = decode_vin(vin) or {}
+        year, model = decoded.get("year"), decoded.get("model")
+
+        # Year/model from title (fallback)
+        if title and (year is None or model is None):
+            m = r.year_model.search(title)
+            if m:
+                year = year or int(m.group(1))
+                model = model or m.group(2).title()
+
+        # Trim: special editions from the title, then the VIN, then the body heuristics
+        trim = _special_trim(title) or decoded.get("trim")
+        has29 = has34 = None
+        if trim is None or self.debug:
+            has29 = bool(r.has_29l.search(main))
+            has34 = bool(r.has_34l.search(main))
+        if trim is None:
+            trim = _infer_trim(title, main, has29, has34)
+
+        # Transmission (raw)
+        trans = (
+            _none_if_na(_spec(specs, r.labels["transmission"]))
+            or _find_in(r.transmission_label, sec.specs, main)
+            or _find_in(r.transmission_word, sec.specs, sec.head, main)
+        )
+
+        extc, intc = self._colors(specs, main)
+
+        # Location
+        loc = _find_in(r.location_label, sec.dealer, main) or _find_in(r.location_city, sec.dealer, main)
+
+        opt_lines = self._option_lines(main)
+
+        row = {
+            "source": "cars.com",
+            "listing_url": url,
+            "price_usd": int(price.replace(",", "")) if price else None,
+            "mileage": int(miles.replace(",", "")) if miles else None,
+            "year": year,
+            "model": model,
+            "trim": trim,
+            "body_style": decoded.get("body_style"),
+            "transmission_raw": trans,
+            "exterior_color": extc,
+            "interior_color": intc,
+            "vin": vin,
+            "location": loc,
+            "description_raw": None,
+            "raw_options": sorted(opt_lines),
+            "photos_count": None,
+            "seller_type": None,
+        }
+
+        # Optional: write trim debug into RAW CSV when debug=true
+        if self.debug:
+            row["_trim_title"] = title or ""
+            row["_has_29L"] = has29
+            row["_has_34L"] = has34
+
+        return row
+
+
+def title_trim(title):
+    """Trim from a listing title alone (search-result cards carry no body text)."""
+    return _infer_trim(title, "") if title else None
+
+
+def card_row(card, debug=False):
+    """
+    Raw cars.com row built from search-result card data only (prefilter card-only
+    mode): price, mileage and year/model/trim from the card title; fields that
+    only the detail page has stay None.
+    """
+    title = card.get("title") or ""
+    m = _YEAR_MODEL_RE.search(title)
+    row = {
+        "source": card.get("source", "cars.com"),
+        "listing_url": card["listing_url"],
+        "price_usd": card.get("price_usd"),
+        "mileage": card.get("mileage"),
+        "year": int(m.group(1)) if m else card.get("year"),
+        "model": m.group(2).title() if m else None,
+        "trim": card.get("trim") or title_trim(title),
+        "body_style": None,
+        "transmission_raw": None,
+        "exterior_color": None,
+        "interior_color": None,
+        "vin": None,
+        "location": None,
+        "description_raw": None,
+        "raw_options": [],
+        "photos_count": None,
+        "seller_type": None,
+    }
+    if debug:
+        row["_trim_title"] = title
+        row["_fetch"] = "card"
+    return row
+
+
+# Process-pool entry points (scraper and --reextract): each worker process builds
+# its Extractor once in the initializer, then only (url, body, specs) cross over.
+_WORKER_EXTRACTOR = None
+
+
+def init_worker(cfg, debug=False):
+    global _WORKER_EXTRACTOR
+    _WORKER_EXTRACTOR = Extractor(cfg, debug)
+
+
+def worker_extract(url, body, specs, fetch=None):
+    row = _WORKER_EXTRACTOR.extract(url, body, specs)
+    if fetch and _WORKER_EXTRACTOR.debug:
+        row["_fetch"] = fetch
+    return row
@@ -0,0 +1,162 @@
+# FILE: x987/scrapers/cars_com_http.py
+# CONTRACT: fetch a cars.com vehicledetail page over plain HTTP and parse the server-rendered HTML
+# (visible text, <dt>/<dd> specs, JSON-LD) into the same (body, specs) the Playwright path extracts
+import json
+from html.parser import HTMLParser
+
+# Rows missing any of these after the HTTP pass are re-scraped in the browser
+DEFAULT_REQUIRED = ["price_usd", "mileage", "year", "model", "vin"]
+
+_SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "head"}
+_BLOCK_TAGS = set(
+    "address article aside blockquote br dd div dl dt footer form h1 h2 h3 h4 h5 h6 "
+    "header hr li main nav ol p section table td th tr ul".split()
+)
+
+
+class _DetailParser(HTMLParser):
+    """Single pass over the HTML: visible text lines, first <dd> per <dt>, and JSON-LD blobs."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.lines = []
+        self.specs = {}
+        self.ld = []
+        self._buf = []
+        self._skip = 0
+        self._ld_buf = None
+        self._dt = None
+        self._dd = None
+        self._label = None
+
+    def _flush(self):
+        line = " ".join("".join(self._buf).split())
+        if line:
+            self.lines.append(line)
+        self._buf = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "script" and dict(attrs).get("type") == "application/ld+json":
+            self._ld_buf = []
+        if tag in _SKIP_TAGS:
+            self._skip += 1
+            return
+        if tag in _BLOCK_TAGS:
+            self._flush()
+        if tag == "dt":
+            self._dt = []
+        elif tag == "dd" and self._label is not None:
+            self._dd = []
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            if tag == "script" and self._ld_buf is not None:
+                self.ld.append("".join(self._ld_buf))
+                self._ld_buf = None
+            self._skip = max(0, self._skip - 1)
+            return
+        if tag in _BLOCK_TAGS:
+            self._flush()
+        if tag == "dt" and self._dt is not None:
+            self._label = " ".join("".join(self._dt).split()) or None
+            self._dt = None
+        elif tag == "dd" and self._dd is not None:
+            val = " ".join("".join(self._dd).split())
+            if val:
+                self.specs.setdefault(self._label, val)
+            self._dd = None
+            self._label = None
+
+    def handle_data(self, data):
+        if self._ld_buf is not None:
+            self._ld_buf.append(data)
+        if self._skip:
+            return
+        self._buf.append(data)
+        if self._dt is not None:
+            self._dt.append(data)
+        if self._dd is not None:
+            self._dd.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+
+def _iter_ld(blobs):
+    for raw in blobs:
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            continue
+        stack = [data]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, list):
+                stack.extend(node)
+            elif isinstance(node, dict):
+                yield node
+                stack.extend(v for v in node.values() if isinstance(v, (dict, list)))
+
+
+def _ld_value(v):
+    if isinstance(v, dict):
+        v = v.get("value") or v.get("name")
+    if v in (None, ""):
+        return None
+    return str(v).strip()
+
+
+def _ld_specs(blobs):
+    """Map the schema.org Car/Vehicle node (if any) onto the spec labels the Extractor reads."""
+    out = {}
+    for node in _iter_ld(blobs):
+        types = node.get("@type")
+        types = types if isinstance(types, list) else [types]
+        if not any(t in ("Car", "Vehicle", "Product") for t in types):
+            continue
+        offers = node.get("offers")
+        if isinstance(offers, list):
+            offers = offers[0] if offers else None
+        pairs = {
+            "Title": node.get("name"),
+            "VIN": node.get("vehicleIdentificationNumber"),
+            "Mileage": node.get("mileageFromOdometer"),
+            "Exterior color": node.get("color"),
+            "Interior color": node.get("vehicleInteriorColor"),
+            "Transmission": node.get("vehicleTransmission"),
+            "Price": offers.get("price") if isinstance(offers, dict) else None,
+        }
+        for k, v in pairs.items():
+            v = _ld_value(v)
+            if v and k not in out:
+                out[k] = v
+    return out
+
+
+def parse_detail_html(html):
+    """Return (body_text, specs) from server-rendered detail HTML. JSON-LD fills labels the DOM lacks."""
+    p = _DetailParser()
+    p.feed(html)
+    p.close()
+    specs = dict(p.specs)
+    for k, v in _ld_specs(p.ld).items():
+        specs.setdefault(k, v)
+    return "\n".join(p.lines), specs
+
+
+def missing_required(row, cfg):
+    required = (cfg.get("http") or {}).get("required") or DEFAULT_REQUIRED
+    return [k for k in required if row.get(k) in (None, "", [])]
+
+
+def fetch_detail_page(client, url):
+    """
+    GET `url` with the pooled `client`. Returns (status, page) where page is
+    (body_text, specs), or None when the response is not a usable 200 page.
+    """
+    resp = client.get(url)
+    if resp.status != 200:
+        return resp.status, None
+    body, specs = parse_detail_html(resp.text)
+    return resp.status, ((body, specs) if body else None)
@@ -0,0 +1,79 @@
+# FILE: x987/scrapers/rules.py
+# CONTRACT: per-site extraction rules (spec labels, body regexes, section headings) read from
+# USER_RULES/<site>.toml over the extractor's built-in defaults; compiled once per file content
+import hashlib
+import pathlib
+import re
+from types import SimpleNamespace
+from ..utils import log
+
+RULES_FILES = {"cars.com": "cars_com.toml"}
+_FLAGS = re.I | re.S
+_CACHE = {}  # (site, sha1 of the rules file or None) -> compiled rules
+
+
+def rules_path(site, cfg):
+    """USER_RULES/<site>.toml from the runtime paths in `cfg`; None when cfg carries no paths."""
+    root = (cfg.get("_paths") or {}).get("USER_RULES")
+    name = RULES_FILES.get(site)
+    return pathlib.Path(root) / name if root and name else None
+
+
+def _compile_regex(field, pat, default):
+    try:
+        rx = re.compile(pat, _FLAGS)
+    except re.error as e:
+        log.warn("Bad rules regex; using built-in", field=field, error=str(e))
+        return default
+    if rx.groups < default.groups:
+        log.warn("Rules regex has too few groups; using built-in", field=field, needs=default.groups)
+        return default
+    return rx
+
+
+def compile_rules(defaults, user=None):
+    """
+    Fold a parsed rules file over `defaults` ({labels, regex, sections}):
+      [labels]   field -> spec labels, tried before the built-in ones
+      [regex]    field -> pattern replacing the built-in (case-insensitive; keeps its capture groups)
+      [sections] kind -> extra heading lines ("specs", "features", "dealer", "history", "junk")
+    Unknown fields and kinds are ignored.
+    """
+    user = user or {}
+    labels = {}
+    for field, names in defaults["labels"].items():
+        extra = user.get("labels", {}).get(field) or []
+        labels[field] = tuple(dict.fromkeys([*([extra] if isinstance(extra, str) else extra), *names]))
+    regex = dict(defaults["regex"])
+    for field, pat in (user.get("regex") or {}).items():
+        if field in regex and isinstance(pat, str):
+            regex[field] = _compile_regex(field, pat, regex[field])
+    headings = {}
+    for kind, heads in defaults["sections"].items():
+        for h in [*heads, *((user.get("sections") or {}).get(kind) or [])]:
+            headings.setdefault(str(h).strip().lower().rstrip(":"), kind)
+    return SimpleNamespace(labels=labels, headings=headings, **regex)
+
+
+def load_rules(site, cfg, defaults):
+    """
+    Compiled rules for `site`. The file is read and hashed on every call (once per
+    extractor), but only compiled the first time its content is seen.
+    """
+    path = rules_path(site, cfg)
+    raw = path.read_bytes() if path is not None and path.is_file() else None
+    key = (site, hashlib.sha1(raw).hexdigest() if raw is not None else None)
+    rules = _CACHE.get(key)
+    if rules is None:
+        user = None
+        if raw is not None:
+            try:
+                import tomllib
+            except ImportError:  # Py < 3.11
+                import tomli as tomllib
+            try:
+                user = tomllib.loads(raw.decode("utf-8"))
+            except (ValueError, UnicodeDecodeError) as e:
+                log.warn("Ignoring unreadable rules file", path=str(path), error=str(e))
+        rules = _CACHE[key] = compile_rules(defaults, user)
+    return rules
@@ -35,6 +35,103 @@ band_1_max=39999
 band_2_max=59999
 band_3_max=79999
 band_4_max=99999
+[browser]
+headed=false
+# persistent_profile=true keeps a Chromium profile (disk cache, cookies, consent) in the user
+# folder across runs (profile_dir overrides the location); storage_state=true alone only
+# carries cookies/localStorage over. Compare cold vs warm with `python -m x987.tools.bench_profile`
+persistent_profile=false
+storage_state=false
+cache_mb=256
+# scraper pages are replaced after recycle_after navigations, or while Chromium's RSS is over
+# max_rss_mb (0 = off; memory is read with psutil, see requirements.txt)
+recycle_after=50
+max_rss_mb=0
+[network]
+# blocked inside the browser (CDP Network.setBlockedURLs, plus Fetch.enable limited to the blocked
+# resource types for extension-less asset URLs) before a page's first navigation; route_types=false
+# adds a Python route on every request (counted as "routed" in the Requests summary; slower)
+block_images=true
+block_media=true
+block_fonts=true
+block_stylesheets=true
+block_analytics=true
+route_types=true
+[prefilter]
+# judge search-result cards before fetching detail pages: years outside min_year..max_year are
+# dropped; cards over a ceiling (0 = none) are dropped, or scraped last with mode="defer";
+# card_only=true builds rows from the cards and fetches no detail pages at all
+enabled=true
+mode="drop"
+max_price_usd=0
+max_mileage=0
+card_only=false
+[collect]
+# result pages are enumerated by URL (<search_url>&page=2, ...) for every search URL in parallel,
+# stopping at the first page with no new listings; "More results"/scroll only if paging is ignored
+page_param="page"
+max_pages=10
+results_timeout_ms=8000  # upper bound; shorter once AutoTempest latency is known
+reveal_fallback=true
+# read listings (url, price, mileage, year, title) from the results page's JSON responses;
+# xhr_match optionally restricts which response URLs are parsed, e.g. ["queue-results"]
+xhr=true
+xhr_match=[]
+# incremental=true: sort results newest first (sort_param=newest_sort) and stop paging once
+# stop_after_known listings in a row were returned by earlier runs (x987-data/meta/seen_listings.json);
+# known listings not reached are reported from their stored rows if scraped within carry_days
+# (needs [state] enabled; without it an incremental run only reports the listings it reached)
+incremental=false
+sort_param="sort"
+newest_sort="date_listed"
+stop_after_known=10
+carry_days=30
+[http]
+# fetch detail pages over plain HTTP first; render in the browser only if a required field is missing
+enabled=true
+required=["price_usd","mileage","year","model","vin"]
+[frontier]
+# listings go to the scraper best-first (new, repriced, stale, rest); the run stops releasing
+# new ones at cap_listings (top level) or after time_budget_s seconds (0 = no limit)
+time_budget_s=0
+[readiness]
+# pages are extracted once a per-site selector is in the DOM (then remaining loads are stopped);
+# the wait is factor x the host's latency percentile so far, clamped to min/max_timeout_ms.
+# Override selectors per host suffix with e.g. [readiness.selectors] "cars.com"=".primary-price"
+min_timeout_ms=2000
+max_timeout_ms=15000
+percentile=0.9
+factor=2.0
+[state]
+# per-listing store in x987-data/meta; listings scraped within ttl_hours are reused,
+# older ones are revalidated with one HTTP request before a full scrape
+enabled=true
+ttl_hours=24
+# bot-wall pages park a listing for this long; sold/removed listings are parked for good
+blocked_retry_hours=1
+[rate_limit]
+# per-host adaptive pacing; starts at 1000/polite_delay_ms requests per second and
+# `concurrency` in flight, backs off on slow/429/blocked pages, ramps up while healthy
+max_concurrency=4
+min_rps=0.2
+max_rps=4.0
+slow_ms=4000
+[extract]
+# parse scraped pages into rows in worker processes while the browser moves on;
+# workers=0 picks min(4, CPUs-1), and with a single CPU extraction stays inline
+processes=true
+workers=0
+# split page text into title / specs / features / dealer sections once and scan each field
+# in its own section (false = every regex scans the whole page, carousels and ads included)
+segment=true
+[archive]
+# keep each scraped page's text + spec list in x987-data/raw/pages for `python -m x987 --reextract`
+enabled=true
+[checkpoint]
+# append scraped rows to x987-data/raw/checkpoints/scrape_<run_id>.jsonl every N rows;
+# an interrupted run continues with `python -m x987 --resume <run_id>`
+enabled=true
+every=10
 [scrapers]
 cars_com=true
 carvana_com=false
@@ -0,0 +1,34 @@
+# tools/bench_collect.py
+# Time link harvesting on a saved AutoTempest results page: the old per-anchor loop
+# (count() + nth(i).get_attribute per link) vs the single HARVEST_JS evaluate.
+#   python -m x987.tools.bench_collect tests/fixtures/autotempest_results.html --repeat 20
+from x987.collectors.autotempest import LINK_SELECTOR, _collect_from_page
+from x987.tools.page_bench import run_page_bench
+
+
+async def _legacy(page):
+    # What _collect_from_page used to do: one IPC round trip per anchor
+    links = page.locator(LINK_SELECTOR)
+    urls = {}
+    for i in range(await links.count()):
+        href = await links.nth(i).get_attribute("href")
+        if href and "cars.com/vehicledetail" in href:
+            urls.setdefault(href.split("?")[0])
+    return list(urls)
+
+
+async def _describe(page):
+    anchors = await page.locator(LINK_SELECTOR).count()
+    found = await _collect_from_page(page)
+    note = f"anchors={anchors} listings={len(found)}"
+    if len(found) != len(await _legacy(page)):
+        note += " WARNING harvest mismatch"
+    return note
+
+
+def main():
+    run_page_bench(_legacy, _collect_from_page, _describe, pages_help="saved results page .html files")
+
+
+if __name__ == "__main__":
+    main()
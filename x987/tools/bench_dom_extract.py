@@ -0,0 +1,34 @@
+# tools/bench_dom_extract.py
+# Time per-page DOM extraction on saved cars.com detail pages: the old multi-round-trip
+# path (body inner_text + one XPath <dd> lookup per label) vs the single evaluate call.
+#   python -m x987.tools.bench_dom_extract tests/fixtures/cars_com_detail.html --repeat 50
+import re
+from x987.scrapers.cars_com import extract_page
+from x987.tools.page_bench import run_page_bench
+
+LEGACY_LABELS = ["Exterior color", "Interior color"]
+
+
+async def _legacy(page):
+    # What _scrape_one used to do: one IPC call for the body, then count() +
+    # inner_text() per label.
+    body = await page.locator("body").inner_text()
+    specs = {}
+    for label in LEGACY_LABELS:
+        loc = page.locator(f'xpath=//dt[normalize-space()="{label}"]/following-sibling::dd[1]').first
+        if await loc.count() > 0:
+            specs[label] = re.sub(r"\s+", " ", await loc.inner_text()).strip()
+    return body, specs
+
+
+async def _describe(page):
+    _, specs = await extract_page(page)
+    return f"specs={len(specs)}"
+
+
+def main():
+    run_page_bench(_legacy, extract_page, _describe, pages_help="saved detail page .html files")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# tools/bench_extract.py
+# Micro-benchmark the cars.com row extractor over a corpus of saved pages.
+# Accepts .html (parsed like the HTTP path), archived .json.gz pages (x987-data/raw/pages/<run_id>)
+# and .txt bodies (optional <name>.specs.json sidecar).
+# Also compares segmented body scans with whole-body scans ([extract] segment): cost per page,
+# and accuracy of body-only extraction against the page's own spec values where it has them.
+#   python -m x987.tools.bench_extract tests/fixtures --repeat 200
+import argparse
+import json
+import re
+import statistics
+import time
+from pathlib import Path
+from x987.pipeline.archive import load_page
+from x987.scrapers.cars_com_extract import Extractor
+from x987.scrapers.cars_com_http import parse_detail_html
+
+
+def load_corpus(paths):
+    """Return [(name, body, specs)] from files or directories of saved pages."""
+    files = []
+    for p in map(Path, paths):
+        files += sorted(p.iterdir()) if p.is_dir() else [p]
+    corpus = []
+    for fp in files:
+        if fp.name.endswith(".json.gz"):
+            page = load_page(fp)
+            body, specs = page.get("body") or "", page.get("specs") or {}
+        elif fp.suffix == ".html":
+            body, specs = parse_detail_html(fp.read_text(encoding="utf-8"))
+        elif fp.suffix == ".txt":
+            body = fp.read_text(encoding="utf-8")
+            side = fp.with_suffix(".specs.json")
+            specs = json.loads(side.read_text(encoding="utf-8")) if side.exists() else {}
+        else:
+            continue
+        corpus.append((fp.name, body, specs))
+    return corpus
+
+
+def _per_page_us(fn, corpus, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for name, body, specs in corpus:
+            fn(name, body, specs)
+        samples.append((time.perf_counter() - t0) / len(corpus) * 1e6)
+    return statistics.median(samples)
+
+
+# row field -> spec label that holds its ground truth
+_TRUTH = {
+    "price_usd": "Price",
+    "mileage": "Mileage",
+    "vin": "VIN",
+    "transmission_raw": "Transmission",
+    "exterior_color": "Exterior color",
+}
+
+
+def _norm(v):
+    return re.sub(r"[^0-9a-z]", "", str(v).lower()) if v not in (None, "") else None
+
+
+def _accuracy(ex, corpus):
+    """(correct, checked) over every truth field present in a page's specs, extracting from body text only."""
+    correct = checked = 0
+    for name, body, specs in corpus:
+        row = ex.extract(name, body, {})
+        for field, label in _TRUTH.items():
+            truth = _norm(specs.get(label))
+            if truth is None:
+                continue
+            checked += 1
+            correct += _norm(row.get(field)) == truth
+    return correct, checked
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("paths", nargs="+", help="saved page files or directories")
+    ap.add_argument("--repeat", type=int, default=50)
+    ap.add_argument("--config", action="store_true", help="use the options catalog from the user config")
+    args = ap.parse_args()
+
+    cfg = {}
+    if args.config:
+        from x987.settings import load_config
+
+        cfg = load_config()
+    corpus = load_corpus(args.paths)
+    if not corpus:
+        raise SystemExit("no .html/.json.gz/.txt pages found")
+
+    ex = Extractor(cfg, debug=True)
+    shared = _per_page_us(lambda n, b, s: ex.extract(n, b, s), corpus, args.repeat)
+    # Old behaviour: the options catalog was compiled again for every URL
+    per_url = _per_page_us(lambda n, b, s: Extractor(cfg, debug=True).extract(n, b, s), corpus, args.repeat)
+
+    whole = Extractor({**cfg, "extract": {**(cfg.get("extract") or {}), "segment": False}}, debug=True)
+    flat = _per_page_us(lambda n, b, s: whole.extract(n, b, s), corpus, args.repeat)
+    seg_ok, checked = _accuracy(ex, corpus)
+    flat_ok, _ = _accuracy(whole, corpus)
+    differ = sum(ex.extract(n, b, s) != whole.extract(n, b, s) for n, b, s in corpus)
+
+    print(f"pages={len(corpus)} repeat={args.repeat}")
+    print(f"shared extractor : {shared:9.1f} us/page")
+    print(f"rebuilt per page : {per_url:9.1f} us/page")
+    print(f"whole-body scans : {flat:9.1f} us/page")
+    print(f"rows differing   : {differ} of {len(corpus)} (segmented vs whole-body)")
+    if checked:
+        print(f"body-only fields : segmented {seg_ok}/{checked}, whole-body {flat_ok}/{checked} match spec values")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# tools/bench_profile.py
+# Page-load time and bytes transferred on a cold vs warm persistent browser profile:
+# run 1 starts from an empty profile directory, later runs reuse it (disk cache, cookies).
+#   python -m x987.tools.bench_profile https://www.autotempest.com/results?... --runs 3
+import argparse
+import statistics
+import tempfile
+import time
+from x987.settings import load_config
+from x987.utils.browser import BrowserSession
+
+_TIMING_JS = r"""
+() => {
+  const nav = performance.getEntriesByType('navigation')[0];
+  const res = performance.getEntriesByType('resource');
+  const bytes = res.reduce((n, r) => n + (r.transferSize || 0), nav ? nav.transferSize || 0 : 0);
+  const cached = res.filter(r => r.transferSize === 0 && r.decodedBodySize > 0).length;
+  return {load_ms: nav ? nav.loadEventEnd - nav.startTime : null, bytes, resources: res.length, cached};
+}
+"""
+
+
+async def _load_all(context, urls):
+    page = await context.new_page()
+    out = []
+    try:
+        for url in urls:
+            t0 = time.perf_counter()
+            await page.goto(url, wait_until="load")
+            wall = (time.perf_counter() - t0) * 1000
+            out.append({"wall_ms": wall, **await page.evaluate(_TIMING_JS)})
+    finally:
+        await page.close()
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("urls", nargs="*", help="pages to load (default: search_urls from config)")
+    ap.add_argument("--runs", type=int, default=2)
+    ap.add_argument("--profile-dir", help="profile to reuse (default: a new temporary one, so run 1 is cold)")
+    args = ap.parse_args()
+
+    cfg = load_config()
+    urls = args.urls or cfg.get("search_urls", [])
+    if not urls:
+        raise SystemExit("no URLs given and config has no search_urls")
+    profile = args.profile_dir or tempfile.mkdtemp(prefix="x987-profile-")
+
+    for run in range(1, args.runs + 1):
+        with BrowserSession(cfg, profile_dir=profile) as session:
+            stats = session.run(_load_all(session, urls))
+        wall = statistics.median(s["wall_ms"] for s in stats)
+        kb = sum(s["bytes"] for s in stats) / 1024
+        cached = sum(s["cached"] for s in stats)
+        total = sum(s["resources"] for s in stats)
+        print(f"run {run}: median load {wall:8.0f} ms, transferred {kb:9.1f} KB, cached {cached}/{total} resources")
+
+
+if __name__ == "__main__":
+    main()
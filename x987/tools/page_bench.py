@@ -0,0 +1,57 @@
+# tools/page_bench.py
+# Shared harness for the browser micro-benchmarks (bench_collect, bench_dom_extract): load each
+# saved page with set_content and time the old multi-round-trip code against its single-evaluate
+# replacement, per page and overall.
+import argparse
+import statistics
+import time
+from pathlib import Path
+from x987.utils.browser import BrowserSession
+
+
+async def _time(fn, page, repeat):
+    out = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        await fn(page)
+        out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+
+async def _bench(session, files, repeat, legacy, single, describe):
+    page = await session.new_page()
+    legacy_all, single_all = [], []
+    try:
+        for fp in files:
+            await page.set_content(Path(fp).read_text(encoding="utf-8"))
+            lt = await _time(legacy, page, repeat)
+            st = await _time(single, page, repeat)
+            legacy_all += lt
+            single_all += st
+            note = await describe(page) if describe else ""
+            print(
+                f"{Path(fp).name}: legacy {statistics.median(lt):.2f} ms, single {statistics.median(st):.2f} ms"
+                + (f", {note}" if note else "")
+            )
+    finally:
+        await page.close()
+    return legacy_all, single_all
+
+
+def run_page_bench(legacy, single, describe=None, pages_help="saved page .html files"):
+    """
+    CLI entry point: `legacy` and `single` are async fn(page) doing the same
+    extraction; `describe` (optional, async fn(page) -> str) adds a note per page.
+    """
+    ap = argparse.ArgumentParser()
+    ap.add_argument("pages", nargs="+", help=pages_help)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    with BrowserSession({"network": {"block_images": True}}) as session:
+        lt, st = session.run(_bench(session, args.pages, args.repeat, legacy, single, describe))
+
+    lm, sm = statistics.median(lt), statistics.median(st)
+    print(
+        f"median per page: legacy {lm:.2f} ms, single {sm:.2f} ms, saved {lm - sm:.2f} ms ({lm / max(sm, 1e-9):.1f}x)"
+    )
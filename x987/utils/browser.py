@@ -0,0 +1,350 @@
+# FILE: x987/utils/browser.py
+# CONTRACT: async Playwright plumbing shared by the collector and the scraper
+import asyncio
+import pathlib
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+from playwright.async_api import async_playwright
+from . import log
+from ..settings import get_paths
+
+PROFILE_DIR = "browser-profile"
+STORAGE_STATE = "storage_state.json"
+
+BLOCK_URL_SUBSTR = [
+    "googletagmanager.com",
+    "google-analytics.com",
+    "doubleclick.net",
+    "facebook.net",
+    "adservice.google",
+    "adsystem",
+    "scorecardresearch",
+    "criteo",
+    "hotjar",
+    "optimizely",
+    "segment.io",
+    "newrelic",
+    "snowplow",
+]
+
+
+# Per-site "ready to extract" selectors (host suffix -> CSS); [readiness.selectors] overrides
+READY_SELECTORS = {
+    "cars.com": "dl.fancy-description-list dt, .primary-price",
+    "autotempest.com": 'a[href*="cars.com/vehicledetail"]',
+}
+
+
+def ready_selector(url, cfg):
+    host = urlsplit(url).netloc.lower()
+    rules = {**READY_SELECTORS, **((cfg.get("readiness") or {}).get("selectors") or {})}
+    for suffix, selector in rules.items():
+        if host == suffix or host.endswith("." + suffix):
+            return selector
+    return None
+
+
+_READY_OR_FAIL_JS = r"""
+([sel, rx]) => !!document.querySelector(sel)
+  || (!!document.body && new RegExp(rx, "i").test(document.body.innerText.slice(0, 3000)))
+"""
+
+
+async def wait_ready(page, selector, timeout_s, stop=True, fail_pattern=None):
+    """
+    Wait until `selector` is in the DOM, or the head of the page text matches
+    `fail_pattern` (a bot wall / dead listing: no point waiting), and return True;
+    False if `timeout_s` passes first. With `stop`, whatever the page is still
+    loading is then cancelled (window.stop()) so the connection and CPU go to the
+    next page instead of late subresources.
+    """
+    ready = True
+    if selector:
+        try:
+            if fail_pattern:
+                await page.wait_for_function(
+                    _READY_OR_FAIL_JS, arg=[selector, fail_pattern], polling=100, timeout=timeout_s * 1000
+                )
+            else:
+                await page.wait_for_selector(selector, state="attached", timeout=timeout_s * 1000)
+        except Exception:
+            ready = False
+    if stop:
+        try:
+            await page.evaluate("window.stop()")
+        except Exception:
+            pass
+    return ready
+
+
+# URL patterns (Network.setBlockedURLs wildcards) standing in for the resource-type filters;
+# matched inside the browser, so blocked requests never reach Python
+TYPE_URL_PATTERNS = {
+    "image": ["*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.avif*", "*.svg*", "*.ico*"],
+    "media": ["*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*"],
+    "font": ["*.woff*", "*.ttf*", "*.otf*"],
+    "stylesheet": ["*.css*"],
+}
+# CDP resource types paused by Fetch.enable for extension-less asset URLs the patterns miss;
+# only these pause (and are failed), documents, scripts and XHR never reach Python
+FETCH_RESOURCE_TYPES = {"image": "Image", "media": "Media", "font": "Font", "stylesheet": "Stylesheet"}
+
+
+class RequestBlocker:
+    """
+    Blocks analytics hosts and heavy resource types per page through CDP
+    (`Network.setBlockedURLs`) instead of a Python route callback per request,
+    and keeps run-wide counters of blocked vs allowed requests and bytes.
+
+    Blocked requests are never sent, so only their count is known; "bytes" is
+    what the allowed requests actually transferred. Extension-less asset URLs the
+    patterns miss are caught by CDP `Fetch.enable` restricted to the blocked
+    resource types, so only those requests pause and get `Fetch.failRequest`.
+    `[network] route_types = true` adds the old Python route on every request
+    (a round trip per request CDP lets through; off by default).
+    """
+
+    def __init__(self, cfg):
+        nw = cfg.get("network", {}) or {}
+        self.block_types = {
+            rtype
+            for rtype, key in (
+                ("image", "block_images"),
+                ("media", "block_media"),
+                ("font", "block_fonts"),
+                ("stylesheet", "block_stylesheets"),
+            )
+            if nw.get(key, True)
+        }
+        self.patterns = [p for t in sorted(self.block_types) for p in TYPE_URL_PATTERNS[t]]
+        if nw.get("block_analytics", True):
+            self.patterns += [f"*{s}*" for s in BLOCK_URL_SUBSTR]
+        self.route_types = bool(nw.get("route_types", False))
+        self.stats = {"allowed": 0, "allowed_bytes": 0, "blocked": 0, "routed": 0, "failed": 0}
+        self.blocked_by_type = Counter()
+        self._attached = {}
+
+    async def install(self, context):
+        context.on("page", self.attach)
+        if self.route_types and self.block_types:
+            await context.route("**/*", self._route)
+
+    async def _route(self, route):
+        if route.request.resource_type in self.block_types:
+            # counted apart from CDP blocks: how much the URL patterns miss
+            self.stats["routed"] += 1
+            self.blocked_by_type[route.request.resource_type] += 1
+            return await route.abort()
+        return await route.continue_()
+
+    def attach(self, page):
+        """
+        Set up blocking on `page` once; returns a future to await before its first
+        goto(). The context's "page" event (popups, pages opened elsewhere) and
+        BrowserSession.new_page() share the same future.
+        """
+        task = self._attached.get(page)
+        if task is None:
+            task = self._attached[page] = asyncio.ensure_future(self._attach(page))
+            page.on("close", lambda _: self._attached.pop(page, None))
+        return task
+
+    async def _attach(self, page):
+        try:
+            cdp = await page.context.new_cdp_session(page)
+            cdp.on("Network.loadingFinished", self._on_finished)
+            cdp.on("Network.loadingFailed", self._on_failed)
+            await cdp.send("Network.enable")
+            if self.patterns:
+                await cdp.send("Network.setBlockedURLs", {"urls": self.patterns})
+            if self.block_types:
+                cdp.on("Fetch.requestPaused", lambda ev: asyncio.ensure_future(self._fail_paused(cdp, ev)))
+                patterns = [{"resourceType": FETCH_RESOURCE_TYPES[t]} for t in sorted(self.block_types)]
+                await cdp.send("Fetch.enable", {"patterns": patterns})
+        except Exception as e:
+            log.warn("CDP blocking unavailable for page", error=str(e))
+
+    async def _fail_paused(self, cdp, ev):
+        try:
+            await cdp.send("Fetch.failRequest", {"requestId": ev["requestId"], "errorReason": "BlockedByClient"})
+        except Exception:
+            pass  # page closed meanwhile
+
+    def _on_finished(self, ev):
+        self.stats["allowed"] += 1
+        self.stats["allowed_bytes"] += int(ev.get("encodedDataLength") or 0)
+
+    def _on_failed(self, ev):
+        if ev.get("blockedReason") or "ERR_BLOCKED_BY_CLIENT" in (ev.get("errorText") or ""):
+            self.stats["blocked"] += 1
+            self.blocked_by_type[(ev.get("type") or "other").lower()] += 1
+        elif not ev.get("canceled"):
+            self.stats["failed"] += 1
+
+    def summary(self):
+        return {**self.stats, "blocked_by_type": dict(self.blocked_by_type)}
+
+
+async def install_blocking(context, cfg):
+    blocker = RequestBlocker(cfg)
+    await blocker.install(context)
+    return blocker
+
+
+def browser_rss_mb():
+    """
+    Resident memory (MB) of the Chromium processes started under this one, or None
+    when it cannot be measured (psutil missing from an older install).
+    """
+    try:
+        import psutil
+    except ImportError:
+        return None
+    total = 0
+    for proc in psutil.Process().children(recursive=True):
+        try:
+            name = proc.name().lower()
+            if "chrom" in name or "headless_shell" in name:
+                total += proc.memory_info().rss
+        except psutil.Error:
+            pass  # exited between listing and reading
+    return total / 2**20
+
+
+class MemoryWatch:
+    """
+    Samples browser RSS every `every` navigations, keeps the run's peak and tells
+    one caller at a time to recycle its page while the last sample is over
+    `limit_mb` (0 = never).
+    """
+
+    def __init__(self, limit_mb=0, every=10):
+        self.limit_mb = limit_mb
+        self.every = max(1, every)
+        self.navs = 0
+        self.last = None
+        self.peak = None
+
+    def tick(self):
+        self.navs += 1
+        if self.navs == 1 or self.navs % self.every == 0:
+            self.last = browser_rss_mb()
+            if self.last is not None:
+                self.peak = max(self.peak or 0.0, self.last)
+
+    def claim_recycle(self):
+        if self.limit_mb and self.last is not None and self.last > self.limit_mb:
+            self.last = None  # the next sample decides whether another page must go
+            return True
+        return False
+
+    def summary(self):
+        return {
+            "peak_rss_mb": round(self.peak) if self.peak is not None else None,
+            "limit_mb": self.limit_mb or None,
+        }
+
+
+class BrowserSession:
+    """
+    One browser and one warm, blocking-enabled context shared by every pipeline
+    stage of a run. The session owns its event loop so the (sync) stages can take
+    turns driving async Playwright work on it via `run()`; stages open pages
+    through `new_page()`.
+
+    Headless unless `[browser] headed = true` is set in config. With
+    `[browser] persistent_profile = true` the context lives in a user-data
+    directory under USER_ROOT, so the HTTP disk cache (site JS bundles), cookies
+    and consent state carry over between runs; `storage_state = true` alone
+    only carries cookies/localStorage over, through USER_ROOT/storage_state.json.
+    """
+
+    def __init__(self, cfg, profile_dir=None):
+        self.cfg = cfg
+        br = cfg.get("browser") or {}
+        self.headed = bool(br.get("headed", False))
+        self.persistent = bool(br.get("persistent_profile", False)) or profile_dir is not None
+        self.keep_storage = bool(br.get("storage_state", False)) or self.persistent
+        self.cache_mb = int(br.get("cache_mb", 256))
+        user_root = pathlib.Path(get_paths()["USER_ROOT"])
+        self.profile_dir = pathlib.Path(profile_dir or br.get("profile_dir") or user_root / PROFILE_DIR)
+        # an explicit profile_dir (e.g. bench_profile's throwaway one) keeps its storage state
+        # with it, so the user's saved cookies and consent are never overwritten
+        self.storage_path = (pathlib.Path(profile_dir) if profile_dir is not None else user_root) / STORAGE_STATE
+        self.loop = asyncio.new_event_loop()
+        self._pw = None
+        self.browser = None
+        self.context = None
+        self.blocker = None
+
+    def run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    async def new_page(self):
+        """A page of the shared context with request blocking already active."""
+        page = await self.context.new_page()
+        if self.blocker is not None:
+            await self.blocker.attach(page)
+        return page
+
+    async def _new_context(self):
+        opts = dict(ignore_https_errors=True)
+        if self.persistent:
+            warm = self.profile_dir.exists() and any(self.profile_dir.iterdir())
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+            ctx = await self._pw.chromium.launch_persistent_context(
+                str(self.profile_dir),
+                headless=not self.headed,
+                args=[f"--disk-cache-size={self.cache_mb * 1024 * 1024}"],
+                **opts,
+            )
+            for pg in ctx.pages:  # the profile's restored blank tab
+                await pg.close()
+            return ctx, "warm" if warm else "cold"
+        self.browser = await self._pw.chromium.launch(headless=not self.headed)
+        if self.keep_storage and self.storage_path.exists():
+            opts["storage_state"] = str(self.storage_path)
+        return await self.browser.new_context(**opts), "fresh"
+
+    async def _start(self):
+        t0 = time.perf_counter()
+        self._pw = await async_playwright().start()
+        self.context, profile = await self._new_context()
+        self.context.set_default_timeout(10_000)
+        self.blocker = await install_blocking(self.context, self.cfg)
+        log.info(
+            "Browser ready",
+            headless=not self.headed,
+            profile=profile,
+            launch_ms=round((time.perf_counter() - t0) * 1000),
+        )
+
+    async def _stop(self):
+        if self.blocker is not None:
+            log.info("Requests", **self.blocker.summary())
+        if self.context is not None and self.keep_storage:
+            try:
+                await self.context.storage_state(path=str(self.storage_path))
+            except Exception as e:
+                log.warn("Could not save storage state", error=str(e))
+        if self.persistent and self.context is not None:
+            await self.context.close()  # flushes the profile's cache index to disk
+        if self.browser is not None:
+            await self.browser.close()
+        if self._pw is not None:
+            await self._pw.stop()
+
+    def __enter__(self):
+        try:
+            self.run(self._start())
+        except BaseException:
+            self.__exit__()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self.run(self._stop())
+        finally:
+            self.loop.close()
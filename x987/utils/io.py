@@ -18,6 +18,7 @@ def _ordered_headers(rows):
         "year",
         "model",
         "trim",
+        "body_style",
         "transmission_raw",
         "transmission_norm",
         "mileage",
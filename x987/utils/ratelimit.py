@@ -0,0 +1,192 @@
+# FILE: x987/utils/ratelimit.py
+# CONTRACT: per-host token bucket with adaptive (AIMD) rate and concurrency for asyncio fetchers;
+# replaces the fixed polite_delay_ms sleep
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+# Responses that mean "slow down" rather than "this page is broken"
+THROTTLE_STATUS = {403, 429, 503}
+
+
+class Ticket:
+    """Filled in by the caller inside `RateLimiter.slot()` so the limiter can learn from it."""
+
+    def __init__(self):
+        self.status = None
+        self.blocked = False
+
+
+class HostLimiter:
+    """
+    Token bucket (rate `rps`, burst 1) plus an in-flight cap `limit`.
+
+    Healthy responses add `step` rps and, every 2*limit successes in a row, one
+    more concurrent request. Slow responses or errors cut the rate by 20%;
+    throttles (403/429/503 or a detected block page) halve rate and concurrency
+    and pause the host for an exponentially growing cooldown.
+    """
+
+    def __init__(
+        self,
+        host,
+        rps=1.0,
+        min_rps=0.2,
+        max_rps=4.0,
+        limit=2,
+        max_limit=4,
+        slow_s=4.0,
+        step=0.1,
+        backoff_s=5.0,
+    ):
+        self.host = host
+        self.rps = rps
+        self.min_rps = min_rps
+        self.max_rps = max_rps
+        self.limit = max(1, min(limit, max_limit))
+        self.max_limit = max_limit
+        self.slow_s = slow_s
+        self.step = step
+        self.backoff_s = backoff_s
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+        self.ok_streak = 0
+        self.strikes = 0
+        self.latencies = deque(maxlen=200)
+        self.stats = {"requests": 0, "slow": 0, "throttled": 0}
+
+    def _refill(self, now):
+        self.tokens = min(1.0, self.tokens + (now - self.updated) * self.rps)
+        self.updated = now
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self._refill(now)
+            if now >= self.cooldown_until and self.in_flight < self.limit and self.tokens >= 1.0:
+                self.tokens -= 1.0
+                self.in_flight += 1
+                return
+            if now < self.cooldown_until:
+                wait = self.cooldown_until - now
+            elif self.tokens < 1.0:
+                wait = (1.0 - self.tokens) / self.rps
+            else:
+                wait = 0.05  # waiting for an in-flight slot
+            await asyncio.sleep(min(max(wait, 0.01), 1.0))
+
+    def feedback(self, latency_s, status=None, blocked=False, error=False, now=None):
+        now = time.monotonic() if now is None else now
+        self.in_flight = max(0, self.in_flight - 1)
+        self.stats["requests"] += 1
+        if not error:
+            self.latencies.append(latency_s)
+
+        if blocked or status in THROTTLE_STATUS:
+            self.throttle(now)
+        elif error or latency_s > self.slow_s:
+            self.stats["slow"] += 1
+            self.ok_streak = 0
+            self.rps = max(self.min_rps, self.rps * 0.8)
+        else:
+            self.strikes = 0
+            self.ok_streak += 1
+            self.rps = min(self.max_rps, self.rps + self.step)
+            if self.ok_streak >= 2 * self.limit and self.limit < self.max_limit:
+                self.limit += 1
+                self.ok_streak = 0
+
+    def throttle(self, now=None):
+        """Halve rate and concurrency and pause the host; also used for blocks detected after the slot."""
+        now = time.monotonic() if now is None else now
+        self.stats["throttled"] += 1
+        self.strikes += 1
+        self.ok_streak = 0
+        self.rps = max(self.min_rps, self.rps * 0.5)
+        self.limit = max(1, self.limit // 2)
+        self.cooldown_until = now + min(120.0, self.backoff_s * 2 ** (self.strikes - 1))
+
+    def percentile(self, q):
+        if not self.latencies:
+            return None
+        xs = sorted(self.latencies)
+        return xs[min(len(xs) - 1, int(q * len(xs)))]
+
+    def summary(self):
+        p90 = self.percentile(0.9)
+        return {
+            **self.stats,
+            "block_rate": round(self.stats["throttled"] / self.stats["requests"], 3) if self.stats["requests"] else 0.0,
+            "rps": round(self.rps, 2),
+            "concurrency": self.limit,
+            "p90_ms": round(p90 * 1000) if p90 is not None else None,
+        }
+
+
+class RateLimiter:
+    """One HostLimiter per host, configured from `[rate_limit]` (start rate defaults to 1000/polite_delay_ms)."""
+
+    def __init__(self, cfg):
+        rl = cfg.get("rate_limit") or {}
+        concurrency = max(1, int(cfg.get("concurrency", 1) or 1))
+        polite_ms = max(1, int(cfg.get("polite_delay_ms", 900) or 900))
+        self.max_concurrency = max(concurrency, int(rl.get("max_concurrency", concurrency * 2)))
+        self._opts = dict(
+            rps=float(rl.get("start_rps", 1000.0 / polite_ms)),
+            min_rps=float(rl.get("min_rps", 0.2)),
+            max_rps=float(rl.get("max_rps", 4.0)),
+            limit=concurrency,
+            max_limit=self.max_concurrency,
+            slow_s=float(rl.get("slow_ms", 4000)) / 1000,
+            backoff_s=float(rl.get("backoff_s", 5.0)),
+        )
+        rd = cfg.get("readiness") or {}
+        self._ready = (
+            float(rd.get("min_timeout_ms", 2000)) / 1000,
+            float(rd.get("max_timeout_ms", 15000)) / 1000,
+            float(rd.get("percentile", 0.9)),
+            float(rd.get("factor", 2.0)),
+        )
+        self.hosts = {}
+
+    def host(self, url):
+        key = urlsplit(url).netloc.lower()
+        h = self.hosts.get(key)
+        if h is None:
+            h = self.hosts[key] = HostLimiter(key, **self._opts)
+        return h
+
+    @asynccontextmanager
+    async def slot(self, url):
+        h = self.host(url)
+        await h.acquire()
+        t = Ticket()
+        t0 = time.monotonic()
+        ok = False
+        try:
+            yield t
+            ok = True
+        finally:
+            h.feedback(time.monotonic() - t0, t.status, t.blocked, error=not ok)
+
+    def blocked(self, url):
+        """Report a bot-wall page recognised from its content after its slot closed."""
+        self.host(url).throttle()
+
+    def ready_timeout_s(self, url, max_s=None):
+        """
+        How long to wait for a page on `url`'s host to become ready: `factor` times
+        the host's latency percentile so far, clamped to [min, max]; max until
+        there is any history.
+        """
+        lo, hi, q, factor = self._ready
+        hi = hi if max_s is None else max_s
+        p = self.host(url).percentile(q)
+        return hi if p is None else min(hi, max(lo, p * factor))
+
+    def summary(self):
+        return {k: h.summary() for k, h in self.hosts.items()}
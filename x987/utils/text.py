@@ -1,5 +1,6 @@
 import re
 import math
+from urllib.parse import urlsplit, urlunsplit
 
 MONO = {"black", "white", "gray", "grey", "silver"}
 
@@ -36,3 +37,12 @@ def mileage_band(m):
     if m <= 99999:
         return "80000-99999"
     return "100000+"
+
+
+def canonical_url(u):
+    """Stable key for a listing URL: lower-cased scheme/host, no query, fragment or trailing slash."""
+    if not u:
+        return ""
+    parts = urlsplit(str(u).strip())
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, "", ""))
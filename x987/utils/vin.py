@@ -0,0 +1,106 @@
+# FILE: x987/utils/vin.py
+# CONTRACT: offline Porsche VIN decoding (model year, model, body style, S/base) from fixed
+# character positions via lookup tables, ISO 3779 check digit, and the VIN key dedupe uses
+import re
+
+_VIN_RE = re.compile(r"^[A-HJ-NPR-Z0-9]{17}$")
+
+# Check digit (position 9): transliterate letters, weight each position, sum mod 11 (10 -> "X")
+_TRANSLIT = {
+    **{str(d): d for d in range(10)},
+    **dict(zip("ABCDEFGH", range(1, 9))),
+    **dict(zip("JKLMN", range(1, 6))),
+    "P": 7,
+    "R": 9,
+    **dict(zip("STUVWXYZ", range(2, 10))),
+}
+_WEIGHTS = (8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2)
+
+# Model-year character (position 10). The code repeats every 30 years; for passenger cars
+# position 7 is a letter from model year 2010 on, which picks the cycle.
+_YEAR_CODES = "ABCDEFGHJKLMNPRSTVWXY123456789"
+_YEAR_BY_CODE = {c: 1980 + i for i, c in enumerate(_YEAR_CODES)}
+
+# Porsche passenger cars (WMI WP0), North American layout:
+#   4 = body, 5 = variant, 6 = restraints, 7-8 = model line, 9 = check, 10 = year, 11 = plant
+_BODY = {"A": "Coupe", "B": "Targa", "C": "Roadster"}
+_VARIANT = {"A": "Base", "B": "S"}
+# (model line, body) -> (model, generation by last model year)
+_MODEL_LINE = {
+    ("98", "A"): ("Cayman", ((2012, "987"),)),
+    ("A8", "A"): ("Cayman", ((2012, "987"), (2016, "981"), (9999, "982"))),
+    ("98", "C"): ("Boxster", ((2004, "986"), (2012, "987"))),
+    ("A8", "C"): ("Boxster", ((2012, "987"), (2016, "981"), (9999, "982"))),
+    ("99", "A"): ("911", ((2004, "996"), (2012, "997"))),
+    ("99", "B"): ("911", ((2004, "996"), (2012, "997"))),
+    ("99", "C"): ("911", ((2004, "996"), (2012, "997"))),
+    ("A9", "A"): ("911", ((2012, "997"), (2019, "991"), (9999, "992"))),
+    ("A9", "B"): ("911", ((2012, "997"), (2019, "991"), (9999, "992"))),
+    ("A9", "C"): ("911", ((2012, "997"), (2019, "991"), (9999, "992"))),
+}
+# Body "C" is a Roadster on a Boxster but a Cabriolet on a 911
+_BODY_BY_MODEL = {("911", "C"): "Cabriolet"}
+
+
+def normalize(vin):
+    """Upper-cased 17-character VIN, or None when `vin` cannot be one (length, I/O/Q)."""
+    v = re.sub(r"[\s-]", "", str(vin or "")).upper()
+    return v if _VIN_RE.match(v) else None
+
+
+def check_digit(vin):
+    """The check digit ("0"-"9" or "X") the first 17 characters of `vin` call for."""
+    total = sum(_TRANSLIT[c] * w for c, w in zip(vin.upper(), _WEIGHTS))
+    r = total % 11
+    return "X" if r == 10 else str(r)
+
+
+def is_valid(vin):
+    v = normalize(vin)
+    return v is not None and v[8] == check_digit(v)
+
+
+def model_year(vin):
+    v = normalize(vin)
+    if v is None or v[9] not in _YEAR_BY_CODE:
+        return None
+    year = _YEAR_BY_CODE[v[9]]
+    return year + 30 if v[6].isalpha() else year
+
+
+def decode(vin):
+    """
+    {vin, year, model, generation, body_style, trim} for a Porsche VIN with a valid
+    check digit, None otherwise. Fields a table does not cover stay None; `trim`
+    is only "Base" or "S" (R, Spyder, Black Edition are not encoded in the VIN).
+    """
+    v = normalize(vin)
+    if v is None or not v.startswith("WP") or v[8] != check_digit(v):
+        return None
+    year = model_year(v)
+    model = generation = None
+    entry = _MODEL_LINE.get((v[6:8], v[3]))
+    if entry is not None:
+        model, gens = entry
+        generation = next((g for last, g in gens if year is not None and year <= last), None)
+    body = _BODY_BY_MODEL.get((model, v[3])) or _BODY.get(v[3])
+    return {
+        "vin": v,
+        "year": year,
+        "model": model,
+        "generation": generation,
+        "body_style": body if v.startswith("WP0") else None,
+        "trim": _VARIANT.get(v[4]) if model in ("Cayman", "Boxster") else None,
+    }
+
+
+def dedupe_key(vin):
+    """
+    The normalized VIN when it can be trusted to identify one car: a valid check
+    digit, or the rest-of-world layout (ZZZ filler) that carries none. Else None,
+    so a garbled VIN never merges two listings.
+    """
+    v = normalize(vin)
+    if v is None:
+        return None
+    return v if v[8] == check_digit(v) or v[3:6] == "ZZZ" else None